@@ -15,11 +15,59 @@ const int startButton = 12;
 // I2C address
 #define SLAVE_ADDRESS 0x08
 
+// Binary frames (see zenbot/protocol.py). A frame starts with FRAME_MAGIC,
+// which is never a valid single-character command.
+#define FRAME_MAGIC   0xA5
+#define FRAME_VERSION 1
+#define MAX_FRAME     32
+#define OP_STOP       0x01
+#define OP_DRIVE      0x02
+#define OP_SPEED      0x03
+#define OP_PLAN_LOAD  0x04
+#define OP_PLAN_RUN   0x05
+#define OP_RAMP       0x06
+#define OP_MOVE       0x07
+
+// Speed ramp profiles
+#define RAMP_LINEAR   0
+#define RAMP_S_CURVE  1
+
+// Onboard motion plans
+#define MAX_PLAN_STEPS  32
+#define PLAN_STEP_SIZE  4
+#define PLAN_KEEP_SPEED 0xFF
+
+// Status block returned by requestEvent (see zenbot.protocol.decode_status)
+#define STATUS_SIZE   8
+
 // Variables
 bool systemActive = true;    // System always active by default
 int currentSpeed = 200;      // Current motor speed (0-255)
 unsigned long lastActivityTime = 0;
 const unsigned long WATCHDOG_TIMEOUT = 15000;  // 15 second timeout
+char currentDirection = 'S';  // F, B, L, R, S or D (per-wheel DRIVE frame)
+char lastCommand = 0;         // Last movement/speed command received
+bool timedDrive = false;     // A DRIVE frame with a duration is running
+unsigned long driveUntil = 0;
+
+struct PlanStep {
+  char command;           // F, B, L, R or S
+  uint8_t level;          // Speed level 0-9, or PLAN_KEEP_SPEED
+  unsigned int duration;  // Milliseconds
+};
+PlanStep plan[MAX_PLAN_STEPS];
+uint8_t planLength = 0;
+uint8_t planIndex = 0;
+bool planActive = false;
+unsigned long stepStarted = 0;
+
+// Speed ramp from rampFrom to rampTo over rampDuration ms
+bool rampActive = false;
+int rampFrom = 0;
+int rampTo = 0;
+unsigned int rampDuration = 0;
+uint8_t rampProfile = RAMP_LINEAR;
+unsigned long rampStarted = 0;
 
 void setup() {
   // Initialize motor control pins
@@ -44,6 +92,7 @@ void setup() {
   // Initialize I2C
   Wire.begin(SLAVE_ADDRESS);
   Wire.onReceive(receiveEvent);
+  Wire.onRequest(requestEvent);
   
   // Initial state
   stopMotors();
@@ -72,6 +121,28 @@ void loop() {
     Serial.println("Emergency stop via button");
   }
   
+  // Advance a running speed ramp
+  if (rampActive) {
+    updateRamp();
+  }
+
+  // Advance a running plan
+  if (planActive && millis() - stepStarted >= plan[planIndex].duration) {
+    planIndex++;
+    if (planIndex < planLength) {
+      startPlanStep();
+    } else {
+      planActive = false;
+      Serial.println("PLAN:DONE");
+    }
+  }
+
+  // End a timed DRIVE frame
+  if (timedDrive && (long)(millis() - driveUntil) >= 0) {
+    timedDrive = false;
+    stopMotors();
+  }
+
   // Check for watchdog timeout
   if (millis() - lastActivityTime > WATCHDOG_TIMEOUT) {
     Serial.println("WATCHDOG: Timeout - stopping motors");
@@ -82,15 +153,203 @@ void loop() {
 }
 
 void receiveEvent(int howMany) {
-  if (Wire.available()) {
-    char command = Wire.read();
-    processCommand(command);
+  if (!Wire.available()) {
+    return;
+  }
+
+  uint8_t first = Wire.read();
+  if (first == FRAME_MAGIC) {
+    uint8_t body[MAX_FRAME];
+    int len = 0;
+    while (Wire.available() && len < MAX_FRAME) {
+      body[len++] = Wire.read();
+    }
+    processFrame(body, len);
+  } else {
+    // Legacy single-character command
+    processCommand((char)first);
+  }
+
+  // Discard anything left over
+  while (Wire.available()) {
+    Wire.read();
   }
 }
 
-void processCommand(char command) {
+// Answer a read with the current status block:
+// version, direction, speed level, PWM, watchdog remaining ms (LE), last command, checksum
+void requestEvent() {
+  uint8_t status[STATUS_SIZE];
+  unsigned long idle = millis() - lastActivityTime;
+  unsigned long remaining = idle < WATCHDOG_TIMEOUT ? WATCHDOG_TIMEOUT - idle : 0;
+  if (remaining > 0xFFFF) {
+    remaining = 0xFFFF;
+  }
+
+  status[0] = FRAME_VERSION;
+  status[1] = currentDirection;
+  status[2] = constrain(map(currentSpeed, 50, 255, 0, 9), 0, 9);
+  status[3] = currentSpeed;
+  status[4] = remaining & 0xFF;
+  status[5] = remaining >> 8;
+  status[6] = lastCommand;
+  status[7] = FRAME_MAGIC;
+  for (int i = 0; i < STATUS_SIZE - 1; i++) {
+    status[7] ^= status[i];
+  }
+  Wire.write(status, STATUS_SIZE);
+}
+
+void processFrame(const uint8_t* body, int len) {
   lastActivityTime = millis();  // Reset watchdog timer
+
+  if (len < 3 || body[0] != FRAME_VERSION) {
+    Serial.println("ERR:FRAME");
+    return;
+  }
+
+  uint8_t checksum = FRAME_MAGIC;
+  for (int i = 0; i < len - 1; i++) {
+    checksum ^= body[i];
+  }
+  if (checksum != body[len - 1]) {
+    Serial.println("ERR:CHECKSUM");
+    return;
+  }
+
+  const uint8_t* payload = body + 2;
+  int payloadLen = len - 3;
+  timedDrive = false;
+  planActive = false;
+  // Like the movement characters, MOVE keeps a running ramp
+  if (body[1] != OP_MOVE) {
+    rampActive = false;
+  }
+  lastCommand = body[1];
+
+  switch (body[1]) {
+    case OP_STOP:
+      stopMotors();
+      Serial.println("ACK:STOP");
+      break;
+
+    case OP_DRIVE: {
+      if (payloadLen < 6) {
+        Serial.println("ERR:FRAME");
+        break;
+      }
+      int left = (int16_t)(payload[0] | (payload[1] << 8));
+      int right = (int16_t)(payload[2] | (payload[3] << 8));
+      unsigned int duration = payload[4] | (payload[5] << 8);
+      setWheels(left, right);
+      if (duration > 0) {
+        driveUntil = millis() + duration;
+        timedDrive = true;
+      }
+      Serial.println("ACK:DRIVE");
+      break;
+    }
+
+    case OP_SPEED:
+      if (payloadLen < 1) {
+        Serial.println("ERR:FRAME");
+        break;
+      }
+      setSpeed(payload[0]);
+      Serial.println("ACK:SPD");
+      break;
+
+    case OP_PLAN_LOAD: {
+      int steps = (payloadLen - 1) / PLAN_STEP_SIZE;
+      int index = payloadLen > 0 ? payload[0] : MAX_PLAN_STEPS;
+      if (steps < 1 || index + steps > MAX_PLAN_STEPS) {
+        Serial.println("ERR:PLAN");
+        break;
+      }
+      for (int i = 0; i < steps; i++) {
+        const uint8_t* step = payload + 1 + i * PLAN_STEP_SIZE;
+        plan[index + i].command = step[0];
+        plan[index + i].level = step[1];
+        plan[index + i].duration = step[2] | (step[3] << 8);
+      }
+      Serial.println("ACK:PLAN");
+      break;
+    }
+
+    case OP_PLAN_RUN:
+      if (payloadLen < 1 || payload[0] < 1 || payload[0] > MAX_PLAN_STEPS) {
+        Serial.println("ERR:PLAN");
+        break;
+      }
+      planLength = payload[0];
+      planIndex = 0;
+      planActive = true;
+      startPlanStep();
+      Serial.println("ACK:RUN");
+      break;
+
+    case OP_RAMP:
+      if (payloadLen < 4) {
+        Serial.println("ERR:FRAME");
+        break;
+      }
+      rampFrom = currentSpeed;
+      rampTo = payload[0];
+      rampDuration = payload[1] | (payload[2] << 8);
+      rampProfile = payload[3];
+      rampStarted = millis();
+      rampActive = true;
+      updateRamp();
+      Serial.println("ACK:RAMP");
+      break;
+
+    case OP_MOVE:
+      if (payloadLen < 2 || (payload[0] != 'F' && payload[0] != 'B' &&
+                             payload[0] != 'L' && payload[0] != 'R')) {
+        Serial.println("ERR:FRAME");
+        break;
+      }
+      // Speed level, or PLAN_KEEP_SPEED for the current (possibly ramping) PWM
+      if (payload[1] != PLAN_KEEP_SPEED) {
+        rampActive = false;
+        setSpeed(map(payload[1], 0, 9, 50, 255));
+      } else {
+        setSpeed(currentSpeed);
+      }
+      switch (payload[0]) {
+        case 'F': forward(); break;
+        case 'B': backward(); break;
+        case 'L': turnLeft(); break;
+        case 'R': turnRight(); break;
+      }
+      Serial.println("ACK:MOVE");
+      break;
+
+    default:
+      Serial.println("ERR:OPCODE");
+      break;
+  }
+}
+
+void processCommand(char command) {
   String response;
+
+  // Status requests (also the register byte of every status read) must not
+  // feed the watchdog, or a polling dashboard would keep a stale move alive
+  if (command != '?') {
+    lastActivityTime = millis();  // Reset watchdog timer
+    lastCommand = command;
+  }
+  // Any new motion command takes over from a running plan or timed drive;
+  // a keepalive ('X') must not, or a heartbeat would keep them going forever
+  if (command != '?' && command != 'X') {
+    planActive = false;
+    timedDrive = false;
+  }
+  // Stops and speed changes end a running ramp; moves keep ramping
+  if (command == 'S' || (command >= '0' && command <= '9')) {
+    rampActive = false;
+  }
   
   // Echo command for verification
   Serial.print("CMD: ");
@@ -99,21 +358,25 @@ void processCommand(char command) {
   // Process based on command character
   switch (command) {
     case 'F': // Forward
+      setSpeed(currentSpeed);
       forward();
       response = "ACK:FWD";
       break;
       
     case 'B': // Backward
+      setSpeed(currentSpeed);
       backward();
       response = "ACK:BWD";
       break;
       
     case 'L': // Left
+      setSpeed(currentSpeed);
       turnLeft();
       response = "ACK:LEFT";
       break;
       
     case 'R': // Right
+      setSpeed(currentSpeed);
       turnRight();
       response = "ACK:RIGHT";
       break;
@@ -123,11 +386,12 @@ void processCommand(char command) {
       response = "ACK:STOP";
       break;
       
-    case '0'...'9': // Speed
+    case '0'...'9': { // Speed
       int speedLevel = command - '0';
       setSpeed(map(speedLevel, 0, 9, 50, 255));  // Map 0-9 to 50-255
       response = "ACK:SPD:" + String(speedLevel);
       break;
+    }
       
     case 'X': // No longer toggles - just a status indicator
       response = "ACK:SYS:ON";
@@ -146,8 +410,55 @@ void processCommand(char command) {
   Serial.println(response);
 }
 
+// Start plan[planIndex]; the plan keeps the watchdog fed while it runs
+void startPlanStep() {
+  PlanStep& step = plan[planIndex];
+  if (step.level != PLAN_KEEP_SPEED) {
+    setSpeed(map(step.level, 0, 9, 50, 255));
+  } else {
+    setSpeed(currentSpeed);
+  }
+
+  switch (step.command) {
+    case 'F': forward(); break;
+    case 'B': backward(); break;
+    case 'L': turnLeft(); break;
+    case 'R': turnRight(); break;
+    default: stopMotors(); break;
+  }
+
+  stepStarted = millis();
+  lastActivityTime = stepStarted;
+}
+
+// Share of the speed change applied after fraction (0-1) of the ramp time
+float rampShape(float fraction) {
+  if (rampProfile == RAMP_S_CURVE) {
+    return fraction * fraction * (3.0 - 2.0 * fraction);
+  }
+  return fraction;
+}
+
+// Set the PWM for the current point of the ramp; ends it at the target
+void updateRamp() {
+  unsigned long elapsed = millis() - rampStarted;
+  float fraction = rampDuration ? (float)elapsed / rampDuration : 1.0;
+  if (fraction >= 1.0) {
+    fraction = 1.0;
+    rampActive = false;
+  }
+  int pwm = rampFrom + (int)round((rampTo - rampFrom) * rampShape(fraction));
+  // Per-wheel DRIVE PWM is left alone; the ramp applies to the next move
+  if (currentDirection == 'D') {
+    currentSpeed = constrain(pwm, 0, 255);
+  } else {
+    setSpeed(pwm);
+  }
+}
+
 // Motor control functions
 void forward() {
+  currentDirection = 'F';
   digitalWrite(in1, LOW);
   digitalWrite(in2, HIGH);
   digitalWrite(in3, HIGH);
@@ -155,6 +466,7 @@ void forward() {
 }
 
 void backward() {
+  currentDirection = 'B';
   digitalWrite(in1, HIGH);
   digitalWrite(in2, LOW);
   digitalWrite(in3, LOW);
@@ -162,6 +474,7 @@ void backward() {
 }
 
 void turnLeft() {
+  currentDirection = 'L';
   digitalWrite(in1, HIGH);
   digitalWrite(in2, LOW);
   digitalWrite(in3, HIGH);
@@ -169,6 +482,7 @@ void turnLeft() {
 }
 
 void turnRight() {
+  currentDirection = 'R';
   digitalWrite(in1, LOW);
   digitalWrite(in2, HIGH);
   digitalWrite(in3, LOW);
@@ -176,12 +490,33 @@ void turnRight() {
 }
 
 void stopMotors() {
+  currentDirection = 'S';
   digitalWrite(in1, LOW);
   digitalWrite(in2, LOW);
   digitalWrite(in3, LOW);
   digitalWrite(in4, LOW);
 }
 
+// Signed PWM for one motor: positive runs it in the forward() direction
+void setMotorA(int speed) {
+  digitalWrite(in1, speed < 0 ? HIGH : LOW);
+  digitalWrite(in2, speed > 0 ? HIGH : LOW);
+  analogWrite(enA, constrain(abs(speed), 0, 255));
+}
+
+void setMotorB(int speed) {
+  digitalWrite(in3, speed > 0 ? HIGH : LOW);
+  digitalWrite(in4, speed < 0 ? HIGH : LOW);
+  analogWrite(enB, constrain(abs(speed), 0, 255));
+}
+
+// Per-wheel signed PWM, wired to match turnLeft()/turnRight()
+void setWheels(int left, int right) {
+  currentDirection = (left == 0 && right == 0) ? 'S' : 'D';
+  setMotorA(left);
+  setMotorB(right);
+}
+
 void setSpeed(int speed) {
   currentSpeed = constrain(speed, 0, 255);
   analogWrite(enA, currentSpeed);
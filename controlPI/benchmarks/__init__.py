@@ -0,0 +1,3 @@
+"""
+Benchmarks for the zenbot command path. Run with ``python -m benchmarks.run``.
+"""
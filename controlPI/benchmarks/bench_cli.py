@@ -0,0 +1,44 @@
+"""
+CLI startup benchmarks.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from .harness import benchmark, latency_result
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_cli(args, runs=5):
+    """
+    Time complete ``python -m zenbot.main`` runs.
+
+    Args:
+        args (list): CLI arguments.
+        runs (int): Number of runs.
+
+    Returns:
+        list: Wall-clock durations in nanoseconds.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    samples = []
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(runs):
+            started = time.perf_counter_ns()
+            subprocess.run([sys.executable, "-m", "zenbot.main"] + args, cwd=cwd, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            samples.append(time.perf_counter_ns() - started)
+    return samples
+
+
+@benchmark("cli_cold_start")
+def cli_cold_start():
+    return {
+        "direct_stop": latency_result(time_cli(["--simulate", "direct", "stop"]), unit="ms",
+                                      target_ms=100),
+        "direct_forward_no_probe": latency_result(
+            time_cli(["--simulate", "direct", "forward", "--no-probe"]), unit="ms", target_ms=100),
+    }
@@ -0,0 +1,149 @@
+"""
+Stress harness: many producer threads sharing one controller on a simulated bus.
+
+Each producer sends numbered drive frames (left = producer, right = sequence
+number). The recorded bus writes must contain every frame exactly once, in
+order per producer; a violation raises AssertionError.
+"""
+import logging
+import threading
+import time
+
+from .harness import Result, benchmark
+from .bench_controller import make_controller
+
+PRODUCERS = 8
+PER_PRODUCER = 250
+
+
+def record_drives(bus):
+    """
+    Record (left, right) of every DRIVE frame written to a simulated bus.
+
+    Args:
+        bus (SimulatedBus): The bus to instrument.
+
+    Returns:
+        list: Filled with (timestamp, left, right) per drive write.
+    """
+    writes = []
+    write_block = bus.write_i2c_block_data
+
+    def recording_write_block(address, register, data, force=None):
+        write_block(address, register, data)
+        # DRIVE body: version, opcode, left (h), right (h), duration (H), checksum
+        if data[1] == 0x02:
+            writes.append((time.perf_counter(),
+                           int.from_bytes(bytes(data[2:4]), "little", signed=True),
+                           int.from_bytes(bytes(data[4:6]), "little", signed=True)))
+
+    bus.write_i2c_block_data = recording_write_block
+    return writes
+
+
+def check_order(writes, producers, per_producer):
+    """
+    Check that each producer's frames were written once each, in order.
+
+    Args:
+        writes (list): (timestamp, producer, sequence) records.
+        producers (int): Number of producer threads.
+        per_producer (int): Frames sent by each producer.
+
+    Raises:
+        AssertionError: On a missing, duplicated or reordered frame.
+    """
+    seen = {p: [] for p in range(producers)}
+    for _, producer, sequence in writes:
+        seen[producer].append(sequence)
+    for producer, sequences in seen.items():
+        assert sequences == list(range(per_producer)), \
+            f"producer {producer}: {len(sequences)} frames, out of order or missing"
+
+
+def run_producers(controller, producers=PRODUCERS, per_producer=PER_PRODUCER):
+    """
+    Hammer a controller from several threads at once.
+
+    Args:
+        controller (MotorController): The shared controller.
+        producers (int): Number of threads.
+        per_producer (int): Drive frames per thread.
+
+    Returns:
+        tuple: (seconds taken, list of error responses)
+    """
+    start = threading.Barrier(producers + 1)
+    errors = []
+
+    def produce(producer):
+        start.wait()
+        for sequence in range(per_producer):
+            response = controller.drive(producer, sequence)
+            if response.startswith("ERROR"):
+                errors.append(response)
+
+    threads = [threading.Thread(target=produce, args=(p,)) for p in range(producers)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    controller.flush()
+    return time.perf_counter() - started, errors
+
+
+@benchmark("concurrent_producers")
+def concurrent_producers():
+    results = {}
+    total = PRODUCERS * PER_PRODUCER
+    for mode, kwargs in (("direct", {}), ("pipelined", {"pipelined": True}),
+                         ("direct_paced", {"command_interval": 0.0005})):
+        controller, bus = make_controller(**kwargs)
+        writes = record_drives(bus)
+        try:
+            elapsed, errors = run_producers(controller)
+        finally:
+            controller.close()
+        assert not errors, errors[:3]
+        check_order(writes, PRODUCERS, PER_PRODUCER)
+        details = {"producers": PRODUCERS, "writes": len(writes)}
+        if "command_interval" in kwargs:
+            gaps = [b[0] - a[0] for a, b in zip(writes, writes[1:])]
+            details["mean_gap_ms"] = sum(gaps) / len(gaps) * 1000
+            details["interval_ms"] = kwargs["command_interval"] * 1000
+        results[mode] = Result(total / elapsed, "cmd/s", **details)
+    return results
+
+
+@benchmark("close_race")
+def close_race():
+    """close() while producers are sending: no exceptions, only error responses."""
+    rounds = 50
+    failures = []
+    started = time.perf_counter()
+    for i in range(rounds):
+        controller, _ = make_controller(pipelined=bool(i % 2), log_level=logging.CRITICAL)
+        go = threading.Event()
+
+        def produce():
+            go.wait()
+            try:
+                for sequence in range(200):
+                    controller.drive(1, sequence)
+                    controller.get_status(max_age=0)
+            except Exception as e:  # Anything raised is a bug
+                failures.append(repr(e))
+
+        threads = [threading.Thread(target=produce) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        go.set()
+        time.sleep(0.001)
+        controller.close()
+        for thread in threads:
+            thread.join()
+    assert not failures, failures[:3]
+    return Result((time.perf_counter() - started) / rounds * 1000, "ms",
+                  higher_is_better=False, rounds=rounds)
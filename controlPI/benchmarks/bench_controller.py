@@ -0,0 +1,273 @@
+"""
+MotorController command path benchmarks against a simulated bus.
+"""
+import logging
+import threading
+import time
+
+from zenbot import MotorController
+from zenbot.simulation import simulated_bus_factory
+
+from .harness import Result, benchmark, latency_result, rate
+
+QUIET = logging.WARNING
+
+
+def make_controller(latency=0.0, **kwargs):
+    """
+    Build a quiet controller on a fresh simulated bus.
+
+    Args:
+        latency (float): Simulated seconds per bus transaction.
+        **kwargs: Extra MotorController arguments.
+
+    Returns:
+        tuple: (MotorController, SimulatedBus)
+    """
+    factory = simulated_bus_factory(latency=latency)
+    kwargs.setdefault("probe", False)
+    kwargs.setdefault("command_interval", 0)
+    kwargs.setdefault("log_level", QUIET)
+    controller = MotorController(bus_factory=factory, **kwargs)
+    return controller, factory(controller.i2c_bus)
+
+
+def stamp_writes(bus):
+    """
+    Record time.perf_counter_ns() at every write on a simulated bus.
+
+    Args:
+        bus (SimulatedBus): The bus to instrument.
+
+    Returns:
+        list: Filled with one timestamp per write.
+    """
+    stamps = []
+    write_byte = bus.write_byte
+    write_block = bus.write_i2c_block_data
+
+    def timed_write_byte(address, value, force=None):
+        write_byte(address, value)
+        stamps.append(time.perf_counter_ns())
+
+    def timed_write_block(address, register, data, force=None):
+        write_block(address, register, data)
+        stamps.append(time.perf_counter_ns())
+
+    bus.write_byte = timed_write_byte
+    bus.write_i2c_block_data = timed_write_block
+    return stamps
+
+
+@benchmark("send_command_throughput")
+def send_command_throughput():
+    results = {}
+    controller, _ = make_controller()
+    try:
+        results["direct"] = Result(rate(lambda: controller.send_command('F'), 5000), "cmd/s")
+    finally:
+        controller.close()
+
+    controller, _ = make_controller(pipelined=True, queue_size=256)
+    try:
+        def burst():
+            for _ in range(100):
+                controller.send_command('F')
+            controller.flush()
+        results["pipelined"] = Result(rate(burst, 50) * 100, "cmd/s")
+    finally:
+        controller.close()
+    return results
+
+
+@benchmark("forward_to_write_latency")
+def forward_to_write_latency():
+    results = {}
+    for mode, kwargs in (("direct", {}), ("pipelined", {"pipelined": True})):
+        controller, bus = make_controller(**kwargs)
+        stamps = stamp_writes(bus)
+        samples = []
+        try:
+            for _ in range(500):
+                started = time.perf_counter_ns()
+                controller.forward()
+                controller.flush()
+                samples.append(stamps[-1] - started)
+        finally:
+            controller.close()
+        results[mode] = latency_result(samples)
+    return results
+
+
+@benchmark("connect_time")
+def connect_time():
+    results = {}
+    for mode, probe, runs in (("probe", True, 3), ("no_probe", False, 200)):
+        samples = []
+        for _ in range(runs):
+            factory = simulated_bus_factory()
+            started = time.perf_counter_ns()
+            controller = MotorController(bus_factory=factory, probe=probe, log_level=QUIET)
+            samples.append(time.perf_counter_ns() - started)
+            controller.close()
+        results[mode] = latency_result(samples, unit="ms")
+    return results
+
+
+@benchmark("breaker_recovery")
+def breaker_recovery():
+    """After an outage whose first trial reads a garbled status block, the
+    controller must recover on its own once the Arduino answers again."""
+    delay = 0.02
+    threshold = 3
+    controller, bus = make_controller(failure_threshold=threshold, reconnect_delay=delay,
+                                      max_reconnect_delay=delay * 4, log_level=logging.CRITICAL)
+    device = bus.devices.pop(controller.address)
+    try:
+        for _ in range(threshold):
+            controller.forward()
+        assert controller.health == "down", "circuit did not open"
+        time.sleep(delay * 1.5)
+        bus.devices[device.address] = device
+        request = device.request
+        device.request = lambda length: bytes(length)  # one garbled read, then back to normal
+        response = controller.get_status(max_age=0)
+        device.request = request
+        assert isinstance(response, str) and response.startswith("ERROR"), "garbled read accepted"
+        started = time.monotonic()
+        while not controller.forward().endswith("sent successfully"):
+            assert time.monotonic() - started < 2.0, "controller never left half-open"
+            time.sleep(0.001)
+        elapsed = time.monotonic() - started
+    finally:
+        controller.close()
+    return Result(elapsed * 1000, "ms", higher_is_better=False, reconnect_delay_ms=delay * 1000)
+
+
+@benchmark("keepalive_timed_drive")
+def keepalive_timed_drive():
+    """A timed drive must still end on time while keepalives are being sent,
+    and the keepalives must stop with it."""
+    duration = 0.5
+    controller, bus = make_controller(keepalive=True, keepalive_interval=0.1)
+    device = bus.devices[controller.address]
+    try:
+        controller.drive(200, 200, duration_ms=int(duration * 1000))
+        started = time.monotonic()
+        while True:
+            time.sleep(0.005)
+            device.update()
+            elapsed = time.monotonic() - started
+            if device.wheels == (0, 0):
+                break
+            assert elapsed < duration + 1.0, "timed drive still running after keepalives"
+        keepalives = device.received.count('X')
+        # Once the drive has ended (allowing for a keepalive already on its
+        # way), the link should go quiet
+        time.sleep(0.05)
+        settled = device.received.count('X')
+        time.sleep(0.3)
+        after = device.received.count('X') - settled
+    finally:
+        controller.close()
+    assert keepalives, "no keepalive was sent during the drive"
+    assert not after, f"{after} keepalives sent after the drive ended"
+    return Result((elapsed - duration) * 1000, "ms", higher_is_better=False,
+                  keepalives=keepalives, duration_ms=duration * 1000)
+
+
+@benchmark("stop_latency")
+def stop_latency():
+    """Time from stop() to the stop write with a full queue of moves ahead of it."""
+    interval = 0.005
+    controller, bus = make_controller(pipelined=True, command_interval=interval, queue_size=32)
+    stopped = threading.Event()
+    write_byte = bus.write_byte
+
+    def watch_stop(address, value, force=None):
+        write_byte(address, value)
+        if value == ord('S'):
+            stopped.stamp = time.perf_counter_ns()
+            stopped.set()
+
+    bus.write_byte = watch_stop
+    samples = []
+    try:
+        for _ in range(50):
+            for i in range(32):
+                controller.send_command('FL'[i % 2])
+            stopped.clear()
+            started = time.perf_counter_ns()
+            controller.stop()
+            stopped.wait()
+            samples.append(stopped.stamp - started)
+            controller.flush()
+    finally:
+        controller.close()
+    # Worst case: the write in flight plus one command_interval
+    return latency_result(samples, unit="ms", queued=32, bound_ms=interval * 1000)
+
+
+@benchmark("setpoint_lag")
+def setpoint_lag():
+    """Age of each written setpoint when a 100 Hz control loop feeds a 50 Hz bus."""
+    results = {}
+    period = 0.01
+    ticks = 150
+    for mode in ("latest", "fifo"):
+        controller, bus = make_controller(pipelined=True, command_interval=0.02, queue_size=32)
+        scheduled = {}
+        lags = []
+        write_block = bus.write_i2c_block_data
+
+        def timed_write_block(address, register, data, force=None):
+            write_block(address, register, data)
+            # The left wheel PWM identifies the tick (DRIVE body: version, opcode, left, ...)
+            tick = int.from_bytes(bytes(data[2:4]), "little", signed=True)
+            lags.append(time.perf_counter_ns() - scheduled[tick])
+
+        bus.write_i2c_block_data = timed_write_block
+        try:
+            start = time.perf_counter_ns()
+            for tick in range(1, ticks + 1):
+                scheduled[tick] = start + int(tick * period * 1e9)
+                delay = (scheduled[tick] - time.perf_counter_ns()) / 1e9
+                if delay > 0:
+                    time.sleep(delay)
+                if mode == "latest":
+                    controller.set_velocity(tick * controller.max_wheel_speed / 255)
+                else:
+                    controller.drive(tick, tick)
+            controller.flush()
+        finally:
+            controller.close()
+        results[mode] = latency_result(lags, unit="ms", writes=len(lags), setpoints=ticks)
+    return results
+
+
+@benchmark("job_startup")
+def job_startup():
+    """Time per short job (open, forward, stop, release) with fresh or pooled controllers."""
+    from zenbot.pool import ControllerPool
+
+    results = {}
+    jobs = 3
+    factory = simulated_bus_factory()
+    samples = []
+    for _ in range(jobs):
+        started = time.perf_counter_ns()
+        with MotorController(bus_factory=factory, log_level=QUIET) as controller:
+            controller.forward()
+        samples.append(time.perf_counter_ns() - started)
+    results["fresh"] = latency_result(samples, unit="ms", jobs=jobs)
+
+    samples = []
+    with ControllerPool() as pool:
+        for _ in range(jobs):
+            started = time.perf_counter_ns()
+            with pool.controller(bus_factory=factory, log_level=QUIET) as controller:
+                controller.forward()
+            samples.append(time.perf_counter_ns() - started)
+    # The first job pays for the probe; the headline p50 is a warm job
+    results["pooled"] = latency_result(samples, unit="ms", jobs=jobs)
+    return results
@@ -0,0 +1,74 @@
+"""
+LLM text-to-command benchmarks.
+"""
+from llm_integration import RobotLLMController
+from zenbot.intent import IntentMatcher, IntentStream
+
+from .bench_controller import make_controller
+from .corpus import UTTERANCES
+from .harness import Result, benchmark, rate
+
+
+def parse_rate(cache_size):
+    """Utterances per second through process_llm_command, plus cache statistics."""
+    controller, _ = make_controller()
+    robot = RobotLLMController(controller=controller, cache_size=cache_size)
+    try:
+        def parse_corpus():
+            for text in UTTERANCES:
+                robot.is_active = True
+                robot.process_llm_command(text)
+        value = rate(parse_corpus, 200) * len(UTTERANCES)
+        info = robot.cache_info()
+        return Result(value, "utterances/s", cache_hits=info.hits, cache_misses=info.misses)
+    finally:
+        controller.close()
+
+
+@benchmark("llm_parse_rate")
+def llm_parse_rate():
+    return parse_rate(cache_size=256)
+
+
+@benchmark("llm_parse_rate_uncached")
+def llm_parse_rate_uncached():
+    return parse_rate(cache_size=0)
+
+
+@benchmark("intent_match_rate")
+def intent_match_rate():
+    matcher = IntentMatcher()
+
+    def match_corpus():
+        for text in UTTERANCES:
+            matcher.parse(text)
+    return Result(rate(match_corpus, 500) * len(UTTERANCES), "utterances/s")
+
+
+@benchmark("intent_stream_rate")
+def intent_stream_rate():
+    stream = IntentStream()
+    tokens = [[word + " " for word in text.split(" ")] for text in UTTERANCES]
+
+    def stream_corpus():
+        for words in tokens:
+            for token in words:
+                stream.feed(token)
+            stream.close()
+    return Result(rate(stream_corpus, 200) * len(UTTERANCES), "utterances/s",
+                  tokens=sum(map(len, tokens)))
+
+
+@benchmark("llm_bus_transactions")
+def llm_bus_transactions():
+    controller, bus = make_controller()
+    robot = RobotLLMController(controller=controller)
+    try:
+        started = bus.transactions
+        for text in UTTERANCES:
+            robot.is_active = True
+            robot.process_llm_command(text)
+        per_utterance = (bus.transactions - started) / len(UTTERANCES)
+        return Result(per_utterance, "transactions/utterance", higher_is_better=False)
+    finally:
+        controller.close()
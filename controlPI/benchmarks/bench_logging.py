@@ -0,0 +1,120 @@
+"""
+Logging overhead on the command path.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+
+from zenbot.logconfig import COMPACT_DATEFMT, COMPACT_FORMAT, DeferredQueueHandler
+
+from .harness import Result, benchmark
+from .bench_controller import make_controller
+
+COUNT = 20000
+
+# Per-record write stall standing in for an SD card or a slow terminal
+SLOW_EMIT = 0.0002
+
+
+class SlowFileHandler(logging.FileHandler):
+    """File handler whose every write stalls for SLOW_EMIT seconds."""
+
+    def emit(self, record):
+        time.sleep(SLOW_EMIT)
+        super().emit(record)
+
+
+def _forward_cost(handler, level, count=COUNT):
+    """
+    Measure microseconds per forward() with a handler on the "zenbot" logger.
+
+    Args:
+        handler (logging.Handler): Handler to attach, or None for no output.
+        level (int): Controller log level.
+        count (int): Number of commands.
+
+    Returns:
+        float: Microseconds per command.
+    """
+    package_logger = logging.getLogger("zenbot")
+    if handler is not None:
+        package_logger.addHandler(handler)
+    try:
+        controller, _ = make_controller(log_level=level)
+        started = time.perf_counter()
+        for _ in range(count):
+            controller.forward()
+        elapsed = time.perf_counter() - started
+        controller.close()
+    finally:
+        if handler is not None:
+            package_logger.removeHandler(handler)
+    return elapsed / count * 1e6
+
+
+def _call_cost(log, count=200000):
+    """Nanoseconds per call of log()."""
+    started = time.perf_counter()
+    for _ in range(count):
+        log()
+    return (time.perf_counter() - started) / count * 1e9
+
+
+@benchmark("log_overhead")
+def log_overhead():
+    formatter = logging.Formatter(COMPACT_FORMAT, COMPACT_DATEFMT)
+    with tempfile.TemporaryDirectory() as tmp:
+        file_handler = logging.FileHandler(os.path.join(tmp, "sync.log"))
+        file_handler.setFormatter(formatter)
+        sync_us = _forward_cost(file_handler, logging.INFO)
+        file_handler.close()
+
+        records = queue.SimpleQueue()
+        file_handler = logging.FileHandler(os.path.join(tmp, "queued.log"))
+        file_handler.setFormatter(formatter)
+        listener = logging.handlers.QueueListener(records, file_handler)
+        listener.start()
+        queued_us = _forward_cost(DeferredQueueHandler(records), logging.INFO)
+        listener.stop()
+        file_handler.close()
+
+        # Same pair with a slow medium: the queued path should not stall
+        slow_handler = SlowFileHandler(os.path.join(tmp, "slow_sync.log"))
+        slow_handler.setFormatter(formatter)
+        slow_sync_us = _forward_cost(slow_handler, logging.INFO, count=2000)
+        slow_handler.close()
+
+        records = queue.SimpleQueue()
+        slow_handler = SlowFileHandler(os.path.join(tmp, "slow_queued.log"))
+        slow_handler.setFormatter(formatter)
+        listener = logging.handlers.QueueListener(records, slow_handler)
+        listener.start()
+        slow_queued_us = _forward_cost(DeferredQueueHandler(records), logging.INFO, count=2000)
+        listener.stop()
+        slow_handler.close()
+
+    quiet_us = _forward_cost(None, logging.WARNING)
+
+    # A disabled debug line on the send path, eager vs deferred formatting
+    probe = logging.getLogger("zenbot.bench")
+    probe.setLevel(logging.INFO)
+    item = ord("F")
+    eager_ns = _call_cost(
+        lambda: probe.debug(f"Sending command: '{chr(item)}' (0x{item:02X})"))
+    lazy_ns = _call_cost(
+        lambda: probe.debug("Sending command: %r (0x%02X)", chr(item), item))
+
+    return {
+        "forward_sync_file": Result(sync_us, "us", higher_is_better=False),
+        "forward_queued": Result(queued_us, "us", higher_is_better=False),
+        "forward_sync_slow": Result(slow_sync_us, "us", higher_is_better=False,
+                                    stall_us=SLOW_EMIT * 1e6),
+        "forward_queued_slow": Result(slow_queued_us, "us", higher_is_better=False,
+                                      stall_us=SLOW_EMIT * 1e6),
+        "forward_quiet": Result(quiet_us, "us", higher_is_better=False),
+        "debug_off_eager": Result(eager_ns, "ns", higher_is_better=False),
+        "debug_off_lazy": Result(lazy_ns, "ns", higher_is_better=False),
+    }
@@ -0,0 +1,70 @@
+"""
+Speed ramp accuracy and bus cost against the simulated Arduino.
+"""
+import time
+
+from zenbot.protocol import RAMP_PROFILES, ramp_pwm
+
+from .harness import Result, benchmark, latency_result
+from .bench_controller import make_controller
+
+DURATION = 0.5
+RATE = 50.0
+
+
+def _ideal(start, target, elapsed, profile):
+    return ramp_pwm(start, target, elapsed / DURATION, RAMP_PROFILES[profile])
+
+
+@benchmark("ramp_accuracy")
+def ramp_accuracy():
+    results = {}
+    for profile in ("linear", "s-curve"):
+        # Host-timed: each SPEED frame against its tick on the schedule
+        controller, bus = make_controller(protocol="binary")
+        controller.set_speed(0)
+        start, target = controller.speed_pwm, 255
+        write_block = bus.write_i2c_block_data
+        writes = []
+
+        def timed_write_block(address, register, data, force=None):
+            write_block(address, register, data)
+            writes.append(time.perf_counter_ns())
+
+        bus.write_i2c_block_data = timed_write_block
+        before = bus.transactions
+        started = time.perf_counter_ns()
+        controller.ramp_speed(9, DURATION, profile, upload=False, rate=RATE)
+        host_writes = bus.transactions - before
+        controller.close()
+        # Tick k (1-based) is written at the deadline of tick k - 1
+        errors = [abs(stamp - started - int(k * 1e9 / RATE)) for k, stamp in enumerate(writes)]
+        results[f"host_{profile}"] = latency_result(errors, unit="ms", writes=host_writes)
+
+        # Onboard: one RAMP frame while driving forward, then sample the
+        # virtual Arduino's wheel PWM
+        for protocol in ("ascii", "binary"):
+            controller, bus = make_controller(protocol=protocol)
+            controller.set_speed(0)
+            controller.forward()
+            device = bus.devices[controller.address]
+            before = bus.transactions
+            sent = time.monotonic()
+            controller.ramp_speed(9, DURATION, profile)
+            onboard_writes = bus.transactions - before
+            worst = 0
+            while True:
+                device.update()
+                elapsed = time.monotonic() - sent
+                wheel = device.wheels[0]
+                worst = max(worst, abs(wheel - _ideal(start, target, elapsed, profile)))
+                if elapsed >= DURATION:
+                    break
+                time.sleep(0.001)
+            device.update()
+            final = device.wheels
+            controller.close()
+            assert final == (target, target), f"{protocol} move ended at {final}, not {target}"
+            results[f"onboard_{protocol}_{profile}"] = Result(worst, "pwm", higher_is_better=False,
+                                                             writes=onboard_writes)
+    return results
@@ -0,0 +1,56 @@
+"""
+Trajectory compilation and playback cost.
+"""
+import math
+import time
+
+from zenbot import trajectory
+from zenbot.trajectory import Trajectory
+
+from .harness import Result, benchmark
+from .bench_controller import make_controller
+
+TICKS = 20000
+
+
+def _profile(count):
+    """A wavy (t, v, w) profile sampled every 0.1 s."""
+    times = [i * 0.1 for i in range(count)]
+    linear = [0.3 + 0.1 * math.sin(t) for t in times]
+    angular = [math.cos(t / 3.0) for t in times]
+    return times, linear, angular
+
+
+@benchmark("trajectory")
+def trajectory_cost():
+    # Compile a profile covering TICKS ticks at a tiny period, so playback never sleeps
+    period = 1e-9
+    times, linear, angular = _profile(TICKS // 50 + 1)
+    started = time.perf_counter()
+    compiled = Trajectory.from_profile(times, linear, angular,
+                                       period=times[-1] / TICKS)
+    compile_s = time.perf_counter() - started
+    compiled = Trajectory(compiled.left, compiled.right, period)
+
+    controller, _ = make_controller()
+    try:
+        started = time.perf_counter()
+        controller.play(compiled, stop_at_end=False)
+        play_us = (time.perf_counter() - started) / len(compiled) * 1e6
+
+        # The same setpoints computed in the loop, one set_velocity() per tick
+        step = times[-1] / TICKS
+        started = time.perf_counter()
+        for i in range(TICKS):
+            t = i * step
+            controller.set_velocity(0.3 + 0.1 * math.sin(t), math.cos(t / 3.0))
+        loop_us = (time.perf_counter() - started) / TICKS * 1e6
+    finally:
+        controller.close()
+
+    backend = "numpy" if trajectory.numpy is not None else "array"
+    return {
+        "compile": Result(len(compiled) / compile_s, "ticks/s", backend=backend),
+        "play_per_tick": Result(play_us, "us", higher_is_better=False, ticks=len(compiled)),
+        "computed_per_tick": Result(loop_us, "us", higher_is_better=False, ticks=TICKS),
+    }
@@ -0,0 +1,41 @@
+"""
+Sample LLM outputs used by the parsing benchmarks.
+"""
+
+UTTERANCES = [
+    "Please activate the robot system",
+    "Set speed to medium",
+    "Please move forward",
+    "Turn to the right",
+    "Move forward again",
+    "Stop moving",
+    "What's your status?",
+    "Okay, I will go forward now.",
+    "Let me turn left to avoid the obstacle.",
+    "Set speed to 7 and keep going.",
+    "I think we should go back a little.",
+    "Move backwards slowly.",
+    "Go forwards until the wall.",
+    "Turn right, then continue.",
+    "Halt! There is something in the way.",
+    "Change speed to max",
+    "Set speed to slow",
+    "The path ahead is clear, so I'll move forward.",
+    "How are you doing?",
+    "Freeze right there.",
+    "I'm not sure what to do next.",
+    "Sure! Turning to the left now.",
+    "Going forward for a bit to explore the room.",
+    "I'll set speed to 3 to be careful here.",
+    "Please shut down the robot",
+    "Wake up, we have work to do.",
+    "Stop moving, I need to take a closer look at what's in front of me.",
+    "Based on the camera image, the doorway is slightly to my right. "
+    "I will turn to the right and then reassess the situation.",
+    "I have analyzed the sensor readings and everything looks normal. "
+    "There are no obstacles within two meters, so the safest option is to "
+    "move forward slowly while I keep monitoring the distance sensor.",
+    "Set speed to max and move forward, then turn right.",
+    "Move forward for 2 seconds, then turn left for half a second and stop moving.",
+    "Go forward for 2 seconds then stop.",
+]
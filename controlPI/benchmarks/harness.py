@@ -0,0 +1,96 @@
+"""
+Benchmark registry and timing helpers.
+"""
+import time
+
+BENCHMARKS = []
+
+
+class Result:
+    """One measured value."""
+
+    def __init__(self, value, unit, higher_is_better=True, **details):
+        """
+        Args:
+            value (float): The headline number compared against the baseline.
+            unit (str): Unit of value, e.g. "cmd/s" or "ms".
+            higher_is_better (bool): Direction of improvement (default: True).
+            **details: Extra numbers stored alongside, not compared.
+        """
+        self.value = value
+        self.unit = unit
+        self.higher_is_better = higher_is_better
+        self.details = details
+
+    def to_dict(self):
+        return dict(value=self.value, unit=self.unit,
+                    higher_is_better=self.higher_is_better, **self.details)
+
+
+def benchmark(name):
+    """
+    Register a function returning a Result (or a dict of name suffix -> Result).
+
+    Args:
+        name (str): Benchmark name used in results and baselines.
+    """
+    def register(fn):
+        BENCHMARKS.append((name, fn))
+        return fn
+    return register
+
+
+def rate(fn, count):
+    """
+    Call fn count times and return calls per second.
+
+    Args:
+        fn (callable): Function to call with no arguments.
+        count (int): Number of calls.
+
+    Returns:
+        float: Calls per second.
+    """
+    started = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - started)
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a list of numbers.
+
+    Args:
+        samples (list): Measured values.
+        pct (float): Percentile from 0 to 100.
+
+    Returns:
+        float: The percentile value.
+    """
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_result(samples_ns, unit="us", **details):
+    """
+    Summarize latency samples as a Result with the p50 as headline value.
+
+    Args:
+        samples_ns (list): Latencies in nanoseconds.
+        unit (str): "us" or "ms".
+        **details: Extra details to record, e.g. a target.
+
+    Returns:
+        Result: Lower-is-better result with p50/p90/p99/max details.
+    """
+    scale = 1e3 if unit == "us" else 1e6
+    return Result(
+        percentile(samples_ns, 50) / scale, unit, higher_is_better=False,
+        p90=percentile(samples_ns, 90) / scale,
+        p99=percentile(samples_ns, 99) / scale,
+        max=max(samples_ns) / scale,
+        samples=len(samples_ns),
+        **details
+    )
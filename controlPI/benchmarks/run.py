@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Run the benchmarks, save the results as JSON and compare them with a baseline.
+
+    python -m benchmarks.run                    # Run all, compare with baseline.json
+    python -m benchmarks.run --save-baseline    # Run all, store as the new baseline
+    python -m benchmarks.run --only cli --threshold 0.3
+"""
+import argparse
+import datetime
+import glob
+import importlib
+import json
+import os
+import platform
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.harness import BENCHMARKS, Result  # noqa: E402
+
+
+def load_benchmarks():
+    """Import every bench_*.py module so its benchmarks register."""
+    for path in sorted(glob.glob(os.path.join(HERE, "bench_*.py"))):
+        importlib.import_module(f"benchmarks.{os.path.basename(path)[:-3]}")
+
+
+def run(only=None):
+    """
+    Run the registered benchmarks.
+
+    Args:
+        only (list): Substrings; run only benchmarks whose name contains one.
+
+    Returns:
+        dict: Result name -> Result.to_dict()
+    """
+    results = {}
+    for name, fn in BENCHMARKS:
+        if only and not any(part in name for part in only):
+            continue
+        print(f"Running {name}...", flush=True)
+        outcome = fn()
+        items = outcome.items() if isinstance(outcome, dict) else [(None, outcome)]
+        for key, result in items:
+            full_name = name if key is None else f"{name}.{key}"
+            assert isinstance(result, Result), full_name
+            results[full_name] = result.to_dict()
+            print(f"  {full_name}: {result.value:.4g} {result.unit}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (dict): Current results.
+        baseline (dict): Baseline results.
+        threshold (float): Allowed relative slowdown, e.g. 0.15 for 15%.
+
+    Returns:
+        list: Names of regressed results.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<45} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            print(f"{name:<45} {'-':>12} {current['value']:>12.4g}")
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        worse = -change if current["higher_is_better"] else change
+        flag = ""
+        if worse > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<45} {base['value']:>12.4g} {current['value']:>12.4g} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="zenbot command path benchmarks")
+    parser.add_argument("--output", default=os.path.join(HERE, "results.json"),
+                        help="Where to write the results (default: benchmarks/results.json)")
+    parser.add_argument("--baseline", default=os.path.join(HERE, "baseline.json"),
+                        help="Baseline to compare with (default: benchmarks/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Relative slowdown reported as a regression (default: 0.15)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store the results as the new baseline instead of comparing")
+    parser.add_argument("--only", action="append",
+                        help="Only run benchmarks whose name contains this (repeatable)")
+    args = parser.parse_args(argv)
+
+    load_benchmarks()
+    results = run(args.only)
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
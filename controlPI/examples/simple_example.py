@@ -2,7 +2,6 @@
 """
 Simple example demonstrating how to use the zenbot-pi package.
 """
-import time
 import logging
 from zenbot import MotorController
 
@@ -27,28 +26,15 @@ def drive_square_pattern():
             print("Failed to communicate with Arduino. Check connections and address.")
             return
         
-        # Set motor speed (0-9)
-        controller.set_speed(6)
-        print("Speed set to 6")
-        time.sleep(1)
+        # Drive in a square pattern (4 sides): forward for 2 seconds, then
+        # turn right for 1 second. execute() times every segment against one
+        # monotonic schedule, so delays don't add up along the path.
+        plan = [("forward", 6, 2), ("right", 6, 1)] * 4
+        print("Driving a square at speed 6...")
         
-        # Drive in a square pattern (4 sides)
-        for side in range(4):
-            print(f"\nDriving side {side+1} of the square")
-            
-            # Move forward for 2 seconds
-            print("Moving forward...")
-            controller.forward()
-            time.sleep(2)
-            
-            # Turn right for 1 second
-            print("Turning right...")
-            controller.right()
-            time.sleep(1)
-        
-        # Stop motors when done
-        print("\nSquare pattern complete!")
-        controller.stop()
+        # Pass upload=True to let the Arduino time the plan itself
+        response = controller.execute(plan)
+        print(f"\nSquare pattern complete! ({response})")
         
     except KeyboardInterrupt:
         print("\nProgram interrupted!")
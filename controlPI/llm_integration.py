@@ -3,116 +3,303 @@
 Example of how to integrate controlPI with an LLM for robot control
 This is just a skeleton example - you would need to add your own LLM integration
 """
+import asyncio
+import functools
 import time
-import re
-from controlPI import MotorController
+from zenbot.pool import get_pool
+from zenbot.intent import NO_INTENT, Intent, IntentMatcher, IntentStream
 
 class RobotLLMController:
     """A simple class to interface between an LLM and a robot"""
     
-    def __init__(self, i2c_bus=3, address=0x08):
-        """Initialize the controller"""
-        self.controller = MotorController(i2c_bus=i2c_bus, address=address)
+    # Intent action -> (controller method, response)
+    _MOVES = {
+        "forward": ("forward", "Moving forward"),
+        "backward": ("backward", "Moving backward"),
+        "left": ("left", "Turning left"),
+        "right": ("right", "Turning right"),
+    }
+    
+    def __init__(self, i2c_bus=3, address=0x08, controller=None, matcher=None,
+                 step_duration=1.0, upload_plans=True, cache_size=256):
+        """Initialize the controller, or wrap an existing MotorController
+        
+        Args:
+            step_duration: Seconds for a movement without a duration that is
+                followed by another one ("go forward, then turn right")
+            upload_plans: Let the Arduino time multi-step commands; set to
+                False for a sketch without frame support
+            cache_size: Number of distinct utterances whose parsed intents
+                are remembered (0 disables the cache)
+        """
+        # A controller from the process-wide pool is shared with later
+        # RobotLLMControllers for the same robot instead of reconnecting
+        self._pool = None
+        if controller is None:
+            self._pool = get_pool()
+            controller = self._pool.acquire(i2c_bus, address)
+        self.controller = controller
+        self.matcher = matcher if matcher is not None else IntentMatcher()
+        self.stream_parser = IntentStream(self.matcher)
+        self._last_streamed = None
+        # Only the parse is cached; is_active and last_command are applied afterwards
+        self._parse_cached = functools.lru_cache(maxsize=cache_size)(self._parse)
+        self.step_duration = step_duration
+        self.upload_plans = upload_plans
         self.is_active = False
         self.last_command = None
         
         # Try to establish communication
         if not self.controller.test_communication():
+            self.close()
             raise Exception("Failed to communicate with Arduino")
     
     def process_llm_command(self, llm_text):
-        """Process natural language command from an LLM and control the robot"""
-        # Convert to lowercase for easier matching
-        text = llm_text.lower()
+        """Process natural language command from an LLM and control the robot
+        
+        Several commands in one utterance ("set speed to max and move
+        forward, then turn right") run in order as one motion plan.
+        """
+        intents = self._parse_cached(" ".join(llm_text.lower().split()).strip(" .!?"))
+        if len(intents) > 1:
+            return self.apply_intents(intents)
+        return self.apply_intent(intents[0] if intents else NO_INTENT)
+    
+    def _parse(self, text):
+        """Parse normalized text into a tuple of Intents"""
+        return tuple(self.matcher.parse_all(text))
+    
+    def cache_info(self):
+        """Hit/miss statistics of the parsed-intent cache
+        
+        Returns:
+            CacheInfo: hits, misses, maxsize and currsize
+        """
+        return self._parse_cached.cache_info()
+    
+    def cache_clear(self):
+        """Forget all cached parses, e.g. after changing the matcher"""
+        self._parse_cached.cache_clear()
+    
+    def feed(self, token):
+        """Process the next chunk of a streamed LLM response
+        
+        Each command is carried out as soon as it is recognized, without
+        waiting for the rest of the response.
         
-        # Check for system commands first
-        if re.search(r'(start|activate|turn on|wake up)', text):
+        Returns:
+            list: Responses for the commands completed by this chunk
+        """
+        return [self._apply_streamed(intent) for intent in self.stream_parser.feed(token)]
+    
+    def end_stream(self):
+        """Finish a streamed LLM response and carry out any pending command
+        
+        Returns:
+            list: Responses for the remaining commands
+        """
+        responses = [self._apply_streamed(intent) for intent in self.stream_parser.close()]
+        self._last_streamed = None
+        return responses
+    
+    def _apply_streamed(self, intent):
+        """Carry out a streamed Intent
+        
+        A halt right after a timed movement is left to the plan, which
+        already ends with a stop; stopping now would cut the movement short.
+        """
+        previous, self._last_streamed = self._last_streamed, intent
+        if (intent.action == "halt" and previous is not None and self.is_active
+                and previous.action in self._MOVES and previous.duration is not None):
+            self.last_command = "stop"
+            return "Stopping when the movement ends"
+        return self.apply_intent(intent)
+    
+    async def stream(self, tokens):
+        """Process a streamed LLM response, yielding responses as commands run
+        
+        Parsing runs on the event loop; the commands, which block on bus
+        pacing and plan timing, run in the default executor one at a time,
+        so other tasks keep running meanwhile.
+        
+        Args:
+            tokens: An async or plain iterable of text chunks
+        """
+        loop = asyncio.get_running_loop()
+        
+        def apply_all(intents):
+            return [self._apply_streamed(intent) for intent in intents]
+        
+        async def run(intents):
+            return await loop.run_in_executor(None, apply_all, intents) if intents else []
+        
+        if hasattr(tokens, "__aiter__"):
+            async for token in tokens:
+                for response in await run(self.stream_parser.feed(token)):
+                    yield response
+        else:
+            for token in tokens:
+                for response in await run(self.stream_parser.feed(token)):
+                    yield response
+        for response in await loop.run_in_executor(None, self.end_stream):
+            yield response
+    
+    def apply_intent(self, intent):
+        """Carry out a recognized Intent and describe the result"""
+        action = intent.action
+        
+        # System commands work whether or not the robot is active
+        if action == "activate":
             if not self.is_active:
-                self.controller.toggle_system()
+                # The sketch is always on; activation only gates motion here
                 self.is_active = True
                 return "Robot system activated"
             else:
                 return "Robot is already active"
                 
-        if re.search(r'(stop|deactivate|turn off|shutdown|shut down)', text):
+        if action == "deactivate":
             self.controller.stop()  # Stop motors first
             if self.is_active:
-                self.controller.toggle_system()
                 self.is_active = False
                 return "Robot system deactivated"
             else:
                 return "Robot is already inactive"
         
+        # Stopping motion is always allowed, and keeps the robot active
+        if action == "halt":
+            self.controller.stop()
+            self.last_command = "stop"
+            return "Stopped movement"
+        
         # If system is not active, we can't control motors
         if not self.is_active:
             return "Robot is not active. Please activate the robot first."
         
-        # Process movement commands
-        if re.search(r'(move|go) forward', text):
-            self.controller.forward()
-            self.last_command = "forward"
-            return "Moving forward"
-            
-        if re.search(r'(move|go) backward|go back', text):
-            self.controller.backward()
-            self.last_command = "backward"
-            return "Moving backward"
-            
-        if re.search(r'turn (left|to the left)', text):
-            self.controller.left()
-            self.last_command = "left"
-            return "Turning left"
-            
-        if re.search(r'turn (right|to the right)', text):
-            self.controller.right()
-            self.last_command = "right"
-            return "Turning right"
-            
-        if re.search(r'stop moving|halt|freeze', text):
-            self.controller.stop()
-            self.last_command = "stop"
-            return "Stopped movement"
+        if action is None:
+            return "I don't understand that command. Try simple movement commands like 'move forward' or 'turn right'."
         
-        # Speed control
-        speed_match = re.search(r'(set|change) speed (to )?([\d]|max|maximum|half|medium|slow|minimum)', text)
-        if speed_match:
-            speed_text = speed_match.group(3)
-            
-            # Convert text speed to number
-            speed_level = None
-            if speed_text == "max" or speed_text == "maximum":
-                speed_level = 9
-            elif speed_text == "half" or speed_text == "medium":
-                speed_level = 5
-            elif speed_text == "slow" or speed_text == "minimum":
-                speed_level = 1
-            elif speed_text.isdigit():
-                speed_level = int(speed_text)
-                if speed_level > 9:
-                    speed_level = 9
-            
-            if speed_level is not None:
-                self.controller.set_speed(speed_level)
-                return f"Speed set to {speed_level}"
-        
-        # Return status if asked
-        if re.search(r'(status|what are you doing|where are you|how are you)', text):
-            return f"Robot is active. Last command: {self.last_command or 'None'}"
-            
-        # Default response if no command matched
-        return "I don't understand that command. Try simple movement commands like 'move forward' or 'turn right'."
+        if action in self._MOVES:
+            method, message = self._MOVES[action]
+            if intent.duration is not None:
+                return self._run_plan([(action, None, intent.duration)])
+            getattr(self.controller, method)()
+            self.last_command = action
+            return message
+        
+        if action == "speed":
+            self.controller.set_speed(intent.speed)
+            return f"Speed set to {intent.speed}"
+        
+        # Status
+        return f"Robot is active. Last command: {self.last_command or 'None'}"
+    
+    def apply_intents(self, intents):
+        """Carry out the Intents of one utterance in order
+        
+        Consecutive movements, speed changes and stops are sent as one
+        motion plan; other commands run between the plans. Deactivating
+        right after movements ends the plan with a stop rather than
+        cutting it short.
+        """
+        responses = []
+        steps = []
+        speed = None
+        for intent in intents:
+            if intent.action == "speed":
+                speed = intent.speed
+            elif intent.action in self._MOVES or (intent.action == "halt" and steps):
+                command = "stop" if intent.action == "halt" else intent.action
+                steps.append((command, speed, intent.duration))
+                speed = None
+            elif intent.action == "deactivate" and steps and self.is_active:
+                # Stopping now would cancel the plan before it runs
+                responses += self._flush_plan(steps, speed, stop=True)
+                steps, speed = [], None
+                self.is_active = False
+                responses.append("Robot system deactivated")
+            else:
+                responses += self._flush_plan(steps, speed)
+                steps, speed = [], None
+                responses.append(self.apply_intent(intent))
+        responses += self._flush_plan(steps, speed)
+        return "; ".join(responses)
+    
+    def _flush_plan(self, steps, speed, stop=False):
+        """Run collected plan steps, or a trailing speed change, and return the responses
+        
+        With stop=True the plan ends with a stop step.
+        """
+        if steps:
+            if speed is not None:
+                # "move forward and set speed to 3": the speed applies to the last step
+                command, _, duration = steps[-1]
+                steps[-1] = (command, speed, duration)
+            if stop:
+                steps.append(("stop", None, None))
+            return [self._run_plan(steps)]
+        if speed is not None:
+            return [self.apply_intent(Intent("speed", speed, 1.0))]
+        return []
+    
+    def _run_plan(self, steps):
+        """Send (command, speed, duration) steps as one plan; a duration of None means
+        step_duration, or keep going for the last step"""
+        if not self.is_active:
+            return "Robot is not active. Please activate the robot first."
+        
+        plan = []
+        messages = []
+        for i, (command, speed, duration) in enumerate(steps):
+            last = i == len(steps) - 1
+            message = "Stopped movement" if command == "stop" else self._MOVES[command][1]
+            if speed is not None:
+                message += f" at speed {speed}"
+            if duration is not None:
+                message += f" for {duration:g}s"
+            messages.append(message)
+            if command != "stop":
+                self.last_command = command
+            if duration is None:
+                duration = 0 if last else self.step_duration
+            plan.append((command, speed, duration))
+        
+        if len(plan) == 1 and steps[0][2] is None:
+            # A single untimed movement needs no plan
+            command, speed, _ = plan[0]
+            response = getattr(self.controller, self._MOVES[command][0])(speed=speed)
+        else:
+            # Keep moving after the last step unless it was timed
+            stop_at_end = steps[-1][2] is not None
+            response = self.controller.execute(plan, upload=self.upload_plans,
+                                               stop_at_end=stop_at_end)
+        if response.startswith("ERROR"):
+            return response
+        return ", then ".join(messages)
     
     def close(self):
-        """Clean up resources"""
+        """Clean up resources
+        
+        Stops the robot. A pooled controller goes back to the pool, warm
+        for the next job; one passed in is closed.
+        """
+        if self._pool is not None:
+            self._pool.release(self.controller)
+            self._pool = None
+            return
         self.controller.stop()
         self.controller.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 
 # Example usage
 def demo_llm_interface():
     """Demonstrate the LLM interface with simulated commands"""
     print("Starting robot LLM controller...")
-    robot = RobotLLMController()
     
     # Example commands that might come from an LLM
     example_commands = [
@@ -126,20 +313,20 @@ def demo_llm_interface():
         "Please shut down the robot"
     ]
     
-    try:
-        for cmd in example_commands:
-            print(f"\nLLM Command: '{cmd}'")
-            response = robot.process_llm_command(cmd)
-            print(f"Robot Response: {response}")
-            time.sleep(2)  # Pause between commands
-            
-    except KeyboardInterrupt:
-        print("\nDemo interrupted!")
-    except Exception as e:
-        print(f"Error: {e}")
-    finally:
-        robot.close()
-        print("Demo completed!")
+    # The robot is stopped when the block exits, however it exits
+    with RobotLLMController() as robot:
+        try:
+            for cmd in example_commands:
+                print(f"\nLLM Command: '{cmd}'")
+                response = robot.process_llm_command(cmd)
+                print(f"Robot Response: {response}")
+                time.sleep(2)  # Pause between commands
+                
+        except KeyboardInterrupt:
+            print("\nDemo interrupted!")
+        except Exception as e:
+            print(f"Error: {e}")
+    print("Demo completed!")
 
 if __name__ == "__main__":
     print("Robot LLM Integration Demo")
@@ -24,12 +24,16 @@ setup(
         "Intended Audience :: Developers",
         "Intended Audience :: Education",
     ],
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     include_package_data=True,
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     install_requires=[
         "smbus2>=0.4.2",
     ],
+    extras_require={
+        # Vectorized trajectory compilation (zenbot.trajectory)
+        "numpy": ["numpy"],
+    },
     entry_points={
         "console_scripts": [
             "zenbot-pi=zenbot.main:main",
@@ -3,5 +3,30 @@ ZenBot-Pi - I2C Motor Controller for Raspberry Pi/Arduino robots
 """
 
 from .motor_controller import MotorController
+from .protocol import Status
 
-__version__ = '0.1.0' 
\ No newline at end of file
+__version__ = '0.1.0'
+
+# Imported on first use, so one-shot CLI commands don't pay for asyncio & co.
+_LAZY_IMPORTS = {
+    'AsyncMotorController': '.async_controller',
+    'BusManager': '.bus_manager',
+    'ControllerPool': '.pool',
+    'pooled': '.pool',
+    'Metrics': '.metrics',
+    'MemorySink': '.metrics',
+    'JsonLinesSink': '.metrics',
+    'PrometheusFileSink': '.metrics',
+}
+
+__all__ = ['MotorController', 'Status'] + list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,293 @@
+"""
+Asyncio-native I2C motor controller.
+"""
+import asyncio
+import logging
+import time
+
+import smbus2
+
+from .protocol import STATUS_SIZE, decode_status
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMotorController:
+    """I2C motor controller for Arduino communication from an asyncio event loop.
+
+    All timing uses asyncio.sleep, so one event loop can drive many robots
+    without a thread per robot. Each bus write is a single short syscall
+    and is issued directly from the loop.
+    """
+
+    def __init__(self, i2c_bus=3, address=0x08, command_interval=0.02, status_ttl=0.25,
+                 bus_factory=None):
+        """
+        Initialize the motor controller. Call ``await connect()`` (or use
+        ``async with``) before sending commands.
+
+        Args:
+            i2c_bus (int): The I2C bus number to use (default: 3).
+            address (int): The I2C address of the Arduino (default: 0x08).
+            command_interval (float): Minimum gap in seconds between two bus writes (default: 0.02).
+            status_ttl (float): Seconds a status snapshot is reused (default: 0.25).
+            bus_factory (callable): Opens a bus given its number (default: smbus2.SMBus).
+        """
+        self.i2c_bus = i2c_bus
+        self.address = address
+        self.command_interval = command_interval
+        self.bus = None
+        self.system_active = True
+        self._lock = None
+        self._bus_factory = bus_factory if bus_factory is not None else smbus2.SMBus
+        self._last_write = 0.0
+        self.status_ttl = status_ttl
+        self._status = None
+        logger.info(f"Initializing AsyncMotorController on I2C bus {i2c_bus}, address 0x{address:02X}")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.bus:
+            await self.stop()
+        await self.close()
+
+    async def connect(self):
+        """
+        Establish I2C connection with the Arduino.
+
+        Returns:
+            bool: True if connection successful, False otherwise.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        try:
+            logger.info(f"Opening I2C bus {self.i2c_bus}")
+            self.bus = self._bus_factory(self.i2c_bus)
+
+            logger.info("Testing connection to Arduino...")
+            try:
+                self.bus.write_byte(self.address, ord('?'))
+                self._last_write = time.monotonic()
+                logger.info("I2C connection successful")
+
+                # Wait for Arduino to stabilize without blocking the loop
+                await asyncio.sleep(0.5)
+
+                return True
+            except OSError as e:
+                logger.error(f"I2C communication error: {str(e)}")
+                logger.error("Check if the Arduino is connected and has the correct I2C address")
+                return False
+
+        except Exception as e:
+            logger.error(f"Connection error: {str(e)}")
+            return False
+
+    async def send_command(self, cmd):
+        """
+        Send a single character command to the Arduino.
+
+        Args:
+            cmd (str or int): The command to send. If a string, the first character is used.
+
+        Returns:
+            str: Response message or error message.
+        """
+        if not self.bus:
+            logger.error("Cannot send command - I2C bus not open")
+            return "ERROR: I2C bus not open"
+
+        cmd_byte = ord(cmd[0]) if isinstance(cmd, str) else cmd
+        async with self._lock:
+            delay = self._last_write + self.command_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return self._write_now(cmd_byte)
+
+    def _write_now(self, cmd_byte):
+        """
+        Write one command byte immediately, bypassing the lock and pacing.
+
+        Args:
+            cmd_byte (int): The command byte to write.
+
+        Returns:
+            str: Response message or error message.
+        """
+        if not self.bus:
+            return "ERROR: I2C bus not open"
+        try:
+            logger.debug("Sending command: %r (0x%02X)", chr(cmd_byte), cmd_byte)
+            self.bus.write_byte(self.address, cmd_byte)
+            self._last_write = time.monotonic()
+            self._status = None
+            return f"Command '{chr(cmd_byte)}' sent successfully"
+        except Exception as e:
+            logger.error(f"Error sending command: {str(e)}")
+            return f"ERROR: {str(e)}"
+
+    async def _drive(self, cmd, duration):
+        """
+        Send a movement command, optionally holding it for a duration.
+
+        If the awaiting task is cancelled while the move is held, a stop is
+        written immediately before the cancellation propagates.
+
+        Args:
+            cmd (str): Movement command character.
+            duration (float): Seconds to hold the move before stopping, or None.
+
+        Returns:
+            str: Response message.
+        """
+        response = await self.send_command(cmd)
+        if duration is None or response.startswith("ERROR"):
+            return response
+        try:
+            await asyncio.sleep(duration)
+        except asyncio.CancelledError:
+            logger.info("Move cancelled - stopping motors")
+            self._write_now(ord('S'))
+            raise
+        return await self.stop()
+
+    async def test_communication(self):
+        """
+        Test basic communication with the Arduino.
+
+        Returns:
+            bool: True if communication successful, False otherwise.
+        """
+        logger.info("Testing I2C communication...")
+        response = await self.send_command('?')
+        if response.startswith("ERROR"):
+            logger.error(f"Communication test failed: {response}")
+            return False
+        logger.info("Communication test passed!")
+        return True
+
+    # Movement commands
+    async def forward(self, *, duration=None):
+        """
+        Move forward.
+
+        Args:
+            duration (float): Stop after this many seconds (default: keep moving).
+
+        Returns:
+            str: Response message.
+        """
+        logger.info("Moving forward")
+        return await self._drive('F', duration)
+
+    async def backward(self, *, duration=None):
+        """
+        Move backward.
+
+        Args:
+            duration (float): Stop after this many seconds (default: keep moving).
+
+        Returns:
+            str: Response message.
+        """
+        logger.info("Moving backward")
+        return await self._drive('B', duration)
+
+    async def left(self, *, duration=None):
+        """
+        Turn left.
+
+        Args:
+            duration (float): Stop after this many seconds (default: keep turning).
+
+        Returns:
+            str: Response message.
+        """
+        logger.info("Turning left")
+        return await self._drive('L', duration)
+
+    async def right(self, *, duration=None):
+        """
+        Turn right.
+
+        Args:
+            duration (float): Stop after this many seconds (default: keep turning).
+
+        Returns:
+            str: Response message.
+        """
+        logger.info("Turning right")
+        return await self._drive('R', duration)
+
+    async def stop(self):
+        """
+        Stop all motors.
+
+        Returns:
+            str: Response message.
+        """
+        logger.info("Stopping motors")
+        return await self.send_command('S')
+
+    async def set_speed(self, level):
+        """
+        Set speed level (0-9).
+
+        Args:
+            level (int): Speed level from 0 (slowest) to 9 (fastest).
+
+        Returns:
+            str: Response message or error message.
+        """
+        if 0 <= level <= 9:
+            logger.info("Setting speed to level %d", level)
+            return await self.send_command(str(level))
+        else:
+            logger.error(f"Invalid speed level: {level} (must be 0-9)")
+            return "ERROR: Invalid speed level (must be 0-9)"
+
+    async def get_status(self, max_age=None):
+        """
+        Read the Arduino's status, reusing a recent snapshot when possible.
+
+        Args:
+            max_age (float): Maximum acceptable snapshot age in seconds
+                (default: status_ttl). Pass 0 to force a bus read.
+
+        Returns:
+            Status: The parsed snapshot, or an error message string.
+        """
+        if max_age is None:
+            max_age = self.status_ttl
+        status = self._status
+        if status is not None and status.age() <= max_age:
+            return status
+        if not self.bus:
+            logger.error("Cannot read status - I2C bus not open")
+            return "ERROR: I2C bus not open"
+        try:
+            async with self._lock:
+                data = self.bus.read_i2c_block_data(self.address, ord('?'), STATUS_SIZE)
+            status = decode_status(data)
+        except Exception as e:
+            logger.error(f"Error reading status: {str(e)}")
+            return f"ERROR: {str(e)}"
+        self._status = status
+        return status
+
+    async def close(self):
+        """
+        Close I2C connection.
+
+        Returns:
+            bool: True if closed successfully, False otherwise.
+        """
+        if self.bus:
+            logger.info("Closing I2C connection")
+            self.bus.close()
+            self.bus = None
+            return True
+        return False
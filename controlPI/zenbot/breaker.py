@@ -0,0 +1,107 @@
+"""
+Circuit breaker for bus transactions: fail fast while the Arduino is unreachable.
+"""
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(OSError):
+    """Raised instead of touching the bus while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Counts consecutive transaction failures and opens after too many.
+
+    While open, callers are refused without a syscall. Once the retry delay
+    has passed, a single trial transaction is let through (half-open); if it
+    fails, the circuit opens again with twice the delay, up to max_delay.
+    A success closes the circuit and resets the delay.
+
+    Attributes:
+        state (str): CLOSED, OPEN or HALF_OPEN.
+        failures (int): Consecutive failures so far.
+        trips (int): Times the circuit opened after closed operation.
+    """
+
+    def __init__(self, failure_threshold=3, retry_delay=0.25, max_delay=8.0, clock=time.monotonic):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit (default: 3).
+            retry_delay (float): Seconds before the first trial (default: 0.25).
+            max_delay (float): Longest delay between trials (default: 8.0).
+            clock (callable): Time source in seconds (default: time.monotonic).
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._delay = retry_delay
+        self._retry_at = 0.0
+
+    @property
+    def retry_in(self):
+        """float: Seconds until the next trial is allowed (0.0 unless open)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._retry_at - self._clock())
+
+    def allow(self):
+        """
+        Ask whether a transaction may use the bus now.
+
+        Returns:
+            bool: True if closed, or if this caller gets the half-open trial.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self._clock() >= self._retry_at:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """
+        Report a successful transaction.
+
+        Returns:
+            bool: True if this closed a circuit that was not closed.
+        """
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.failures = 0
+            self._delay = self.retry_delay
+            return recovered
+
+    def record_failure(self):
+        """
+        Report a failed transaction.
+
+        Returns:
+            bool: True if this opened the circuit.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                # Back off further after a failed trial
+                self._delay = min(self._delay * 2, self.max_delay)
+            elif self.state == OPEN or self.failures < self.failure_threshold:
+                return False
+            else:
+                self.trips += 1
+            self.state = OPEN
+            self._retry_at = self._clock() + self._delay
+            return True
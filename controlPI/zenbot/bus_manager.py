@@ -0,0 +1,180 @@
+"""
+Shared I2C bus handles for driving several Arduinos from one process.
+"""
+import logging
+import threading
+import time
+
+import smbus2
+
+from .motor_controller import MotorController
+
+logger = logging.getLogger(__name__)
+
+
+class BusManager:
+    """Owns one SMBus handle per bus number and hands out per-address controllers.
+
+    Every controller created for a bus shares that bus's handle and its
+    lock, so transactions to different addresses never interleave.
+    """
+
+    def __init__(self, bus_factory=None):
+        """
+        Initialize an empty manager. Buses are opened on first use.
+
+        Args:
+            bus_factory (callable): Opens a bus given its number (default: smbus2.SMBus).
+        """
+        self._bus_factory = bus_factory if bus_factory is not None else smbus2.SMBus
+        self._buses = {}
+        self._locks = {}
+        self._controllers = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get_bus(self, i2c_bus=3):
+        """
+        Get the shared handle for a bus, opening it if needed.
+
+        Args:
+            i2c_bus (int): The I2C bus number (default: 3).
+
+        Returns:
+            tuple: The (SMBus, threading.Lock) pair for the bus.
+        """
+        with self._lock:
+            if i2c_bus not in self._buses:
+                logger.info(f"Opening shared I2C bus {i2c_bus}")
+                self._buses[i2c_bus] = self._bus_factory(i2c_bus)
+                self._locks[i2c_bus] = threading.Lock()
+            return self._buses[i2c_bus], self._locks[i2c_bus]
+
+    def controller(self, address, i2c_bus=3, probe=False, **kwargs):
+        """
+        Get the controller for an address, creating it on first use.
+
+        Args:
+            address (int): The I2C address of the Arduino.
+            i2c_bus (int): The I2C bus number (default: 3).
+            probe (bool): Send a status probe when the controller is created (default: False).
+            **kwargs: Extra MotorController arguments, used on creation only.
+
+        Returns:
+            MotorController: A controller bound to the shared bus handle.
+        """
+        key = (i2c_bus, address)
+        with self._lock:
+            controller = self._controllers.get(key)
+        if controller is not None:
+            return controller
+
+        bus, bus_lock = self.get_bus(i2c_bus)
+        controller = MotorController(
+            i2c_bus=i2c_bus, address=address, bus=bus, bus_lock=bus_lock,
+            probe=probe, **kwargs
+        )
+        with self._lock:
+            # Another thread may have won the race
+            existing = self._controllers.setdefault(key, controller)
+        if existing is not controller:
+            controller.close()
+        return existing
+
+    def controllers(self, i2c_bus=None):
+        """
+        List the controllers handed out so far.
+
+        Args:
+            i2c_bus (int): Only return controllers on this bus (default: all buses).
+
+        Returns:
+            list: MotorController instances.
+        """
+        with self._lock:
+            return [c for (bus_num, _), c in sorted(self._controllers.items())
+                    if i2c_bus is None or bus_num == i2c_bus]
+
+    def broadcast(self, cmd, i2c_bus=None):
+        """
+        Write one command to every managed address.
+
+        Each bus lock is taken once and the writes go out back to back,
+        bypassing controller pipelines and pacing.
+
+        Args:
+            cmd (str or int): The command to send. If a string, the first character is used.
+            i2c_bus (int): Only address robots on this bus (default: all buses).
+
+        Returns:
+            dict: Mapping of (i2c_bus, address) to a response or error message.
+        """
+        cmd_byte = ord(cmd[0]) if isinstance(cmd, str) else cmd
+        with self._lock:
+            targets = sorted(k for k in self._controllers
+                             if i2c_bus is None or k[0] == i2c_bus)
+            buses = {k[0]: (self._buses[k[0]], self._locks[k[0]]) for k in targets}
+
+        results = {}
+        for bus_num, (bus, bus_lock) in buses.items():
+            with bus_lock:
+                for key in targets:
+                    if key[0] != bus_num:
+                        continue
+                    try:
+                        bus.write_byte(key[1], cmd_byte)
+                        controller = self._controllers[key]
+                        controller._last_write = time.monotonic()
+                        controller._track_motion(cmd_byte)
+                        # Or coalescing would skip the next move as "no change"
+                        controller._record_external(cmd_byte)
+                        results[key] = f"Command '{chr(cmd_byte)}' sent successfully"
+                    except Exception as e:
+                        logger.error(f"Broadcast to 0x{key[1]:02X} failed: {str(e)}")
+                        results[key] = f"ERROR: {str(e)}"
+        return results
+
+    def stop_all(self, i2c_bus=None):
+        """
+        Stop every managed robot.
+
+        Queued moves and running execute()/play()/ramp_speed() calls are
+        cancelled first, so nothing restarts a robot after the stop.
+
+        Args:
+            i2c_bus (int): Only stop robots on this bus (default: all buses).
+
+        Returns:
+            dict: Mapping of (i2c_bus, address) to a response or error message.
+        """
+        logger.info("Stopping all robots")
+        controllers = self.controllers(i2c_bus)
+        # Queued moves and host-timed plans must not restart the robots
+        for controller in controllers:
+            controller._cancel_motion()
+        results = self.broadcast('S', i2c_bus)
+        # A move a pipeline writer had already taken may have gone out after the stop
+        for controller in controllers:
+            controller.flush(timeout=1.0)
+            if controller._motors_running():
+                results[(controller.i2c_bus, controller.address)] = controller.stop()
+        return results
+
+    def close(self):
+        """Close every controller and every shared bus handle."""
+        with self._lock:
+            controllers = list(self._controllers.values())
+            buses = list(self._buses.items())
+            self._controllers.clear()
+            self._buses.clear()
+            self._locks.clear()
+        for controller in controllers:
+            controller.close()
+        for bus_num, bus in buses:
+            logger.info(f"Closing shared I2C bus {bus_num}")
+            bus.close()
@@ -0,0 +1,269 @@
+"""
+Control daemon: one long-lived MotorController behind a Unix domain socket.
+
+The protocol is one command per line, one response line per command, in
+order. Clients may send many lines without waiting for the replies
+(pipelining). Commands are the ``zenbot-pi direct`` actions plus:
+
+- ``F``/``B``/``L``/``R``/``S``/``0``-``9`` - raw command characters
+- ``drive LEFT RIGHT [DURATION_MS]`` - per-wheel PWM
+- ``velocity LINEAR [ANGULAR]`` - body velocity in m/s and rad/s
+- ``ping`` - answers ``pong`` without touching the bus
+"""
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+
+from .motor_controller import MotorController
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = os.environ.get("ZENBOT_SOCKET", "/tmp/zenbot-pi.sock")
+
+# Longest request line accepted, including the newline
+MAX_LINE = 256
+
+_ACTIONS = {
+    "forward": lambda c: c.forward(),
+    "backward": lambda c: c.backward(),
+    "left": lambda c: c.left(),
+    "right": lambda c: c.right(),
+    "stop": lambda c: c.stop(),
+    "status": lambda c: c.get_status(),
+}
+
+
+def handle_request(controller, line):
+    """
+    Run one protocol line against a controller.
+
+    Args:
+        controller (MotorController): The controller to drive.
+        line (str): The request without its newline.
+
+    Returns:
+        str: The single-line response.
+    """
+    parts = line.split()
+    if not parts:
+        return "ERROR: Empty request"
+    name = parts[0]
+    try:
+        if name == "ping":
+            return "pong"
+        if name in _ACTIONS and len(parts) == 1:
+            return str(_ACTIONS[name](controller))
+        if name.isdigit() and len(name) == 1:
+            return controller.set_speed(int(name))
+        if name in ("F", "B", "L", "R", "S") and len(parts) == 1:
+            return controller.send_command(name)
+        if name == "drive" and len(parts) in (3, 4):
+            return controller.drive(*(int(p) for p in parts[1:]))
+        if name == "velocity" and len(parts) in (2, 3):
+            return controller.set_velocity(*(float(p) for p in parts[1:]))
+    except ValueError as e:
+        return f"ERROR: {str(e)}"
+    return f"ERROR: Unknown request: {line}"
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers every line of one client connection, in order.
+
+    If the client goes away before reading its replies, the lines it
+    already sent still run; only the replies are dropped.
+    """
+
+    def handle(self):
+        self._replying = True
+        while True:
+            try:
+                line = self.rfile.readline(MAX_LINE)
+            except ConnectionResetError:
+                return
+            if not line:
+                return
+            if len(line) == MAX_LINE and not line.endswith(b"\n"):
+                self._reply("ERROR: Request too long")
+                return
+            # A shorter line without a newline is the last one before EOF, e.g. from
+            # "printf stop | socat - UNIX:...": run it like any other
+            request = line.decode("ascii", "replace").strip()
+            logger.debug("Request: %s", request)
+            self._reply(handle_request(self.server.controller, request))
+
+    def _reply(self, response):
+        """Write one response line, unless the client has disconnected."""
+        if not self._replying:
+            return
+        try:
+            self.wfile.write(response.replace("\n", " ").encode("ascii", "replace") + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("Client disconnected; running its remaining requests without replies")
+            self._replying = False
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ControlServer:
+    """Serves a MotorController on a Unix domain socket.
+
+    The controller stays open for the lifetime of the server, so clients
+    pay one socket round trip per command instead of a bus bring-up.
+    """
+
+    def __init__(self, controller, socket_path=DEFAULT_SOCKET_PATH):
+        """
+        Bind the socket. A stale socket file from a dead daemon is replaced.
+
+        Args:
+            controller (MotorController): The controller to serve. It is
+                stopped and closed when the server closes.
+            socket_path (str): Path of the Unix domain socket.
+
+        Raises:
+            OSError: If another daemon is already listening on the path.
+        """
+        self.controller = controller
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            if _is_listening(socket_path):
+                raise OSError(f"A daemon is already listening on {socket_path}")
+            os.unlink(socket_path)
+        self._server = _ThreadingUnixServer(socket_path, _RequestHandler)
+        self._server.controller = controller
+        self._thread = None
+
+    def serve_forever(self):
+        """Handle clients until shutdown() is called or the process is interrupted."""
+        logger.info(f"Listening on {self.socket_path}")
+        self._server.serve_forever()
+
+    def start(self):
+        """
+        Handle clients on a background thread.
+
+        Returns:
+            ControlServer: self
+        """
+        self._thread = threading.Thread(target=self.serve_forever, name="zenbot-daemon",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop serving, remove the socket file, stop the robot and close the controller."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self.controller.stop()
+        self.controller.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _is_listening(socket_path):
+    """Check whether a server accepts connections on socket_path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(socket_path=DEFAULT_SOCKET_PATH, i2c_bus=3, address=0x08, bus_factory=None, **kwargs):
+    """
+    Run the daemon in the foreground until interrupted.
+
+    Args:
+        socket_path (str): Path of the Unix domain socket.
+        i2c_bus (int): The I2C bus number (default: 3).
+        address (int): The I2C address of the Arduino (default: 0x08).
+        bus_factory (callable): Opens the bus given its number (default: smbus2.SMBus).
+        **kwargs: Extra MotorController arguments. Commands are pipelined
+            unless pipelined=False is passed.
+    """
+    kwargs.setdefault("pipelined", True)
+    if threading.current_thread() is threading.main_thread():
+        # Clean up on SIGTERM (systemd, kill) the same way as on Ctrl+C
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    controller = MotorController(i2c_bus=i2c_bus, address=address, bus_factory=bus_factory,
+                                 **kwargs)
+    with ControlServer(controller, socket_path) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Shutting down daemon")
+
+
+class DaemonClient:
+    """Thin client for a running daemon. One connection, many requests."""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, timeout=5.0):
+        """
+        Connect to the daemon.
+
+        Args:
+            socket_path (str): Path of the daemon's Unix domain socket.
+            timeout (float): Socket timeout in seconds (default: 5.0).
+
+        Raises:
+            OSError: If no daemon is listening.
+        """
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(socket_path)
+        except OSError:
+            self._sock.close()
+            raise
+        self._rfile = self._sock.makefile("rb")
+
+    def request(self, *lines):
+        """
+        Send requests in one write and read their responses.
+
+        Args:
+            *lines (str): Protocol lines, e.g. "forward", "5", "drive 200 -200".
+
+        Returns:
+            list: One response string per request, in order.
+        """
+        self._sock.sendall("".join(f"{line}\n" for line in lines).encode("ascii"))
+        responses = []
+        for _ in lines:
+            response = self._rfile.readline()
+            if not response:
+                raise ConnectionError("Daemon closed the connection")
+            responses.append(response.decode("ascii", "replace").rstrip("\n"))
+        return responses
+
+    def close(self):
+        """Close the connection."""
+        self._rfile.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,74 @@
+"""
+Host-side keepalive that feeds the Arduino watchdog only when the link is idle.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Heartbeat:
+    """Background thread that sends a no-op after the link has been idle.
+
+    The thread sleeps until ``idle_after`` seconds past the last bus write
+    and re-checks then, so any real command written in the meantime pushes
+    the next heartbeat back instead of adding to the traffic.
+    """
+
+    def __init__(self, send, last_activity, idle_after=12.0, should_beat=None,
+                 name="zenbot-heartbeat"):
+        """
+        Initialize and start the heartbeat.
+
+        Args:
+            send (callable): Called with no arguments to write the no-op.
+            last_activity (callable): Returns the time.monotonic() of the last bus write.
+            idle_after (float): Idle seconds before a heartbeat is sent (default: 12.0).
+            should_beat (callable): Returns False to skip a due heartbeat,
+                e.g. while the motors are stopped (default: always beat).
+            name (str): Name of the heartbeat thread.
+        """
+        if idle_after <= 0:
+            raise ValueError("idle_after must be positive")
+        self._send = send
+        self._last_activity = last_activity
+        self.idle_after = idle_after
+        self._should_beat = should_beat
+        self.beats = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Stop the heartbeat thread.
+
+        Args:
+            timeout (float): Maximum time to wait for the thread to exit.
+        """
+        self._stopped.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self):
+        """Sleep until the link would go idle, then beat if it did."""
+        while True:
+            due = self._last_activity() + self.idle_after
+            delay = due - time.monotonic()
+            if delay > 0:
+                if self._stopped.wait(delay):
+                    return
+                continue
+            if self._stopped.is_set():
+                return
+            if self._should_beat is None or self._should_beat():
+                logger.debug("Link idle - sending heartbeat")
+                try:
+                    self._send()
+                    self.beats += 1
+                except Exception as e:
+                    logger.error(f"Heartbeat error: {str(e)}")
+            # Wait a full interval even if nothing was sent
+            if self._stopped.wait(self.idle_after):
+                return
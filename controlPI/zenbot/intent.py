@@ -0,0 +1,285 @@
+"""
+Natural-language intent matching for robot commands, e.g. from an LLM.
+
+All phrases are compiled into one alternation, so an utterance is scanned
+once. When several intents occur in the same text, the one with the
+highest priority wins: stopping motion beats everything else, and the
+system commands beat movement, speed and status. parse_all() instead
+returns every intent in order, with durations ("for 2 seconds") attached
+to the movements they follow.
+
+IntentStream does the same for text that arrives in chunks, such as
+streamed LLM tokens, and reports each intent as soon as more text can no
+longer change it.
+"""
+import collections
+import re
+
+# (action, priority, pattern); the first listed alternative wins at a given
+# position, so longer phrases come before their prefixes ("stop moving")
+_RULES = (
+    ("halt", 100, r"stop moving|halt|freeze"),
+    ("deactivate", 90, r"stop|deactivate|turn off|shut ?down"),
+    ("activate", 80, r"start|activate|turn on|wake up"),
+    ("forward", 50, r"(?:move|go|going|moving) forwards?"),
+    ("backward", 50, r"(?:move|go|going|moving) backwards?|go back"),
+    ("left", 50, r"turn(?:ing)? (?:to the )?left"),
+    ("right", 50, r"turn(?:ing)? (?:to the )?right"),
+    ("speed", 40, r"(?:set|change) (?:the )?speed (?:to )?"
+                  r"(?P<level>\d+|max(?:imum)?|half|medium|slow|minimum)"),
+    ("status", 10, r"status|what are you doing|where are you|how are you"),
+    # Not an intent of its own: qualifies the movement next to it
+    ("duration", 0, r"for (?P<amount>half an?|an?|one|two|three|four|five|\d+(?:\.\d+)?) "
+                    r"(?P<unit>seconds?|secs?|s|milliseconds?|ms)"),
+)
+
+MOVE_ACTIONS = ("forward", "backward", "left", "right")
+
+# Actions whose phrase can grow into a different action's phrase by one
+# more word ("stop" -> "stop moving")
+_OPEN_ENDED = ("deactivate",)
+
+# Clause punctuation, or a complete next word
+_CLAUSE_END = re.compile(r"\s*[.,;:!?\n]")
+_NEXT_WORD = re.compile(r"\W+\w+\W")
+
+_SPEED_WORDS = {"max": 9, "maximum": 9, "half": 5, "medium": 5, "slow": 1, "minimum": 1}
+
+
+_AMOUNT_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                 "half a": 0.5, "half an": 0.5}
+
+
+def _seconds(match):
+    """Convert a matched duration phrase to seconds."""
+    amount = match.group("amount")
+    seconds = _AMOUNT_WORDS[amount] if amount in _AMOUNT_WORDS else float(amount)
+    if match.group("unit").startswith("m"):
+        seconds /= 1000.0
+    return seconds
+
+
+def _speed_level(text):
+    """Convert a matched speed word or number to a level from 0 to 9."""
+    if text.isdigit():
+        return min(9, int(text))
+    return _SPEED_WORDS[text]
+
+
+class Intent(collections.namedtuple('Intent', 'action speed confidence duration',
+                                    defaults=(None,))):
+    """A recognized command.
+
+    Attributes:
+        action (str): One of "halt", "deactivate", "activate", "forward",
+            "backward", "left", "right", "speed", "status", or None if
+            nothing was recognized.
+        speed (int): Speed level (0-9) for "speed", otherwise None.
+        confidence (float): 1.0 for a single unambiguous intent, lower when
+            the text also contained conflicting intents, 0.0 for no match.
+        duration (float): Seconds to keep moving, for movements with a
+            duration ("for 2 seconds"), otherwise None.
+    """
+    __slots__ = ()
+
+
+NO_INTENT = Intent(None, None, 0.0)
+
+
+class IntentMatcher:
+    """Single-pass matcher over one precompiled pattern."""
+
+    def __init__(self, rules=_RULES, open_ended=_OPEN_ENDED):
+        """
+        Compile the rules into one pattern.
+
+        Args:
+            rules (tuple): (action, priority, pattern) triples. Patterns may
+                use a named group "level" for the speed value.
+            open_ended (tuple): Actions that a stream only reports once the
+                next word or the end of the clause has arrived.
+        """
+        self.open_ended = frozenset(open_ended)
+        self._priority = {action: priority for action, priority, _ in rules}
+        self._top_priority = max(self._priority.values())
+        self._pattern = re.compile(
+            r"\b(?:" + "|".join(f"(?P<{action}>{pattern})" for action, _, pattern in rules) + r")\b"
+        )
+
+    def parse(self, text):
+        """
+        Find the intent of one utterance.
+
+        Args:
+            text (str): The utterance, in any case.
+
+        Returns:
+            Intent: The highest-priority intent found, or NO_INTENT.
+        """
+        best = None
+        best_priority = -1
+        actions = set()
+        for match in self._pattern.finditer(text.lower()):
+            action = match.lastgroup
+            if action == "duration":
+                continue
+            actions.add(action)
+            priority = self._priority[action]
+            if priority > best_priority:
+                best, best_priority = match, priority
+                if priority == self._top_priority:
+                    break
+
+        if best is None:
+            return NO_INTENT
+        return self._intent(best, 1.0 if len(actions) == 1 else 0.6)
+
+    def parse_all(self, text):
+        """
+        Find every intent of one utterance, in order.
+
+        A duration applies to the movement just before it, or else to the
+        next one ("for 2 seconds, turn left"). A bare "stop" right after a
+        movement ends that movement ("halt") instead of deactivating.
+
+        Args:
+            text (str): The utterance, in any case.
+
+        Returns:
+            list: Intents in order of appearance.
+        """
+        intents = []
+        pending = None
+        for match in self._pattern.finditer(text.lower()):
+            if match.lastgroup == "duration":
+                seconds = _seconds(match)
+                if intents and intents[-1].action in MOVE_ACTIONS and intents[-1].duration is None:
+                    intents[-1] = intents[-1]._replace(duration=seconds)
+                else:
+                    pending = seconds
+                continue
+            intent = self._intent(match, 1.0, intents[-1].action if intents else None)
+            if pending is not None and intent.action in MOVE_ACTIONS:
+                intent = intent._replace(duration=pending)
+                pending = None
+            intents.append(intent)
+        return intents
+
+    @staticmethod
+    def _intent(match, confidence, previous=None):
+        """Build the Intent for one match of the combined pattern.
+
+        A bare "stop" after a movement (previous) ends it ("go forward for
+        2 seconds then stop"), so it is a halt rather than a deactivate.
+        """
+        action = match.lastgroup
+        if action == "deactivate" and previous in MOVE_ACTIONS and match.group() == "stop":
+            action = "halt"
+        speed = _speed_level(match.group("level")) if action == "speed" else None
+        return Intent(action, speed, confidence)
+
+    def _settled(self, match, text):
+        """Check whether more text after a match could still change its intent."""
+        end = match.end()
+        if end == len(text):
+            # The last word may still be growing ("go back" -> "go backward")
+            return False
+        if match.lastgroup not in self.open_ended:
+            return True
+        return bool(_CLAUSE_END.match(text, end) or _NEXT_WORD.match(text, end))
+
+
+class IntentStream:
+    """Incremental intent matching over text that arrives in chunks.
+
+    Each intent is reported once, in order of appearance, as soon as the
+    text after it rules out a longer phrase. Movements are reported without
+    waiting for a duration; if one follows, the movement is reported again
+    with the duration set.
+    """
+
+    def __init__(self, matcher=None, max_pending=256):
+        """
+        Initialize an empty stream.
+
+        Args:
+            matcher (IntentMatcher): The matcher to use (default: the default rules).
+            max_pending (int): Characters of unmatched text kept for phrases
+                split across chunks (default: 256).
+        """
+        self.matcher = matcher if matcher is not None else _default_matcher
+        self.max_pending = max_pending
+        self._buffer = ""
+        self._last_move = None
+        self._last_action = None
+
+    def feed(self, chunk):
+        """
+        Add text and collect the intents it completes.
+
+        Args:
+            chunk (str): The next piece of text, e.g. one LLM token.
+
+        Returns:
+            list: Newly recognized Intents, in order.
+        """
+        self._buffer += chunk.lower()
+        return self._scan(final=False)
+
+    def close(self):
+        """
+        End the text and collect the intents still pending.
+
+        The stream is empty afterwards and can be reused.
+
+        Returns:
+            list: Remaining Intents, in order.
+        """
+        intents = self._scan(final=True)
+        self._buffer = ""
+        self._last_move = None
+        self._last_action = None
+        return intents
+
+    def _scan(self, final):
+        text = self._buffer
+        intents = []
+        keep_from = 0
+        for match in self.matcher._pattern.finditer(text):
+            if not final and not self.matcher._settled(match, text):
+                keep_from = match.start()
+                break
+            keep_from = match.end()
+            if match.lastgroup == "duration":
+                if self._last_move is not None:
+                    intents.append(self._last_move._replace(duration=_seconds(match)))
+                    self._last_move = None
+                continue
+            intent = self.matcher._intent(match, 1.0, self._last_action)
+            self._last_action = intent.action
+            self._last_move = intent if intent.action in MOVE_ACTIONS else None
+            intents.append(intent)
+        else:
+            # Only the tail can still start a phrase
+            if len(text) - keep_from > self.max_pending:
+                limit = len(text) - self.max_pending
+                cut = text.rfind(" ", 0, limit)
+                keep_from = max(keep_from, cut + 1 if cut >= 0 else limit)
+        self._buffer = text[keep_from:]
+        return intents
+
+
+_default_matcher = IntentMatcher()
+
+
+def parse_intent(text):
+    """
+    Find the intent of one utterance with the default rules.
+
+    Args:
+        text (str): The utterance, in any case.
+
+    Returns:
+        Intent: The recognized intent, or NO_INTENT.
+    """
+    return _default_matcher.parse(text)
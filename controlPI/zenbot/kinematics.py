@@ -0,0 +1,39 @@
+"""
+Differential-drive kinematics: body velocity to signed per-wheel PWM.
+
+Positive linear velocity drives forward and positive angular velocity
+turns left (counter-clockwise), the same wheel directions as forward()
+and left() on MotorController.
+"""
+from .protocol import MAX_PWM
+
+# Defaults for the stock chassis
+WHEEL_BASE = 0.15       # m between the wheel contact points
+MAX_WHEEL_SPEED = 0.5   # m/s of a wheel at full PWM
+
+
+def velocity_to_pwm(linear, angular, wheel_base=WHEEL_BASE, max_wheel_speed=MAX_WHEEL_SPEED):
+    """
+    Convert a body velocity to per-wheel PWM.
+
+    If a wheel would need more than full PWM, both wheels are slowed by the
+    same factor, so the robot keeps the requested turn radius.
+
+    Args:
+        linear (float): Forward speed in m/s (negative reverses).
+        angular (float): Turn rate in rad/s, positive to the left.
+        wheel_base (float): Distance between the wheels in m (default: WHEEL_BASE).
+        max_wheel_speed (float): Wheel speed in m/s at full PWM (default: MAX_WHEEL_SPEED).
+
+    Returns:
+        tuple: (left, right) PWM, each from -255 to 255.
+    """
+    scale = MAX_PWM / max_wheel_speed
+    turn = angular * wheel_base / 2.0
+    left = (linear - turn) * scale
+    right = (linear + turn) * scale
+    peak = max(abs(left), abs(right))
+    if peak > MAX_PWM:
+        left = left * MAX_PWM / peak
+        right = right * MAX_PWM / peak
+    return int(round(left)), int(round(right))
@@ -0,0 +1,55 @@
+"""
+Non-blocking log output for the control path.
+
+Log calls on the command path only put the record on a queue; a
+background thread formats it and does the (possibly slow, e.g. SD card)
+file and console I/O.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+
+# One short line per record: time, level initial, logger, message
+COMPACT_FORMAT = "%(asctime)s.%(msecs)03d %(levelname).1s %(name)s: %(message)s"
+COMPACT_DATEFMT = "%H:%M:%S"
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The records never leave the process, so they don't have to be reduced
+    to plain strings first. Log arguments must not be mutated afterwards,
+    which holds for the ints and strings the controllers log.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def start_queue_logging(handlers, level=logging.INFO, fmt=COMPACT_FORMAT, datefmt=COMPACT_DATEFMT):
+    """
+    Route the root logger through a queue drained by a background thread.
+
+    Args:
+        handlers (list): Handlers doing the actual output, e.g. a FileHandler
+            and a StreamHandler. They are given the compact formatter.
+        level (int): Root logger level (default: logging.INFO).
+        fmt (str): Record format (default: COMPACT_FORMAT).
+        datefmt (str): Time format (default: COMPACT_DATEFMT).
+
+    Returns:
+        QueueListener: The running listener. It is stopped, flushing the
+        queue, at interpreter exit.
+    """
+    formatter = logging.Formatter(fmt, datefmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(records))
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -2,172 +2,252 @@
 """
 ZenBot-Pi - I2C Motor Controller CLI Tool
 """
-import time
+import contextlib
 import logging
+import os
 import sys
-import argparse
 from .motor_controller import MotorController
+from .pool import pooled
 
-def run_test_sequence(i2c_bus=3, address=0x08):
+DIRECT_ACTIONS = ("forward", "backward", "left", "right", "stop",
+                  "0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "status")
+
+def run_test_sequence(i2c_bus=3, address=0x08, bus_factory=None):
     """Run a basic test sequence"""
     logger = logging.getLogger(__name__)
     logger.info("===== Starting Motor Controller Test =====")
    
-    # Create controller with the specified I2C bus and address
-    controller = MotorController(i2c_bus=i2c_bus, address=address)
+    # Reuse this process's controller for the bus and address, if it has one;
+    # the motors are stopped when the block exits
+    with pooled(i2c_bus=i2c_bus, address=address, bus_factory=bus_factory) as controller:
+        try:
+            # Test communication
+            if not controller.test_communication():
+                logger.error("Failed to communicate with Arduino")
+                return
+               
+            print("\nSystem is always active in this version.")
+            print("Beginning motor test sequence...\n")
+           
+            # Test movement
+            logger.info("Testing movement commands")
+           
+            # Each segment is timed against one monotonic schedule
+            plan = [
+                ("forward", 5, 1),   # Medium speed
+                ("right", None, 1),
+                ("backward", None, 1),
+                ("left", None, 1),
+                ("stop", None, 0.5),
+            ]
+            print("Speed 5 (medium): forward, right, backward, left for 1 second each...")
+            response = controller.execute(plan)
+            print(f"Response: {response}")
+           
+            print("\nTest sequence complete!")
+           
+        except Exception as e:
+            logger.error(f"Error during testing: {str(e)}")
+    logger.info("===== Test Complete =====")
+
+def interactive_mode(i2c_bus=3, address=0x08, bus_factory=None):
+    """Start an interactive control mode"""
+    logger = logging.getLogger(__name__)
+    logger.info("===== Starting Interactive Control Mode =====")
    
-    try:
+    # Reuse this process's controller for the bus and address, if it has one;
+    # the motors are stopped when the block exits
+    with pooled(i2c_bus=i2c_bus, address=address, bus_factory=bus_factory) as controller:
         # Test communication
         if not controller.test_communication():
             logger.error("Failed to communicate with Arduino")
             return
-           
-        print("\nSystem is always active in this version.")
-        print("Beginning motor test sequence...\n")
-       
-        # Test movement
-        logger.info("Testing movement commands")
-       
-        controller.set_speed(5)  # Set medium speed
-        time.sleep(0.5)
-        print("Speed set to 5 (medium)")
-       
-        print("Moving forward for 1 second...")
-        controller.forward()
-        time.sleep(1)
-       
-        print("Turning right for 1 second...")
-        controller.right()
-        time.sleep(1)
-       
-        print("Moving backward for 1 second...")
-        controller.backward()
-        time.sleep(1)
-       
-        print("Turning left for 1 second...")
-        controller.left()
-        time.sleep(1)
-       
-        print("Stopping motors...")
-        controller.stop()
-        time.sleep(0.5)
        
-        print("\nTest sequence complete!")
+        print("\n🤖 ZenBot-Pi Interactive Control Mode 🤖")
+        print("-----------------------------")
+        print("System is always active in this version!")
+        print("Commands:")
+        print("  F - Move Forward")
+        print("  B - Move Backward")
+        print("  L - Turn Left")
+        print("  R - Turn Right")
+        print("  S - Stop")
+        print("  0-9 - Set Speed")
+        print("  ? - Get Status")
+        print("  Q - Quit")
+        print("")
        
-    except Exception as e:
-        logger.error(f"Error during testing: {str(e)}")
-    finally:
-        # Stop motors and close connection
-        controller.stop()
-        controller.close()
-        logger.info("===== Test Complete =====")
+        try:
+            while True:
+                cmd = input("Enter command: ").strip().upper()
+               
+                if cmd == 'Q':
+                    break
+                
+                elif cmd == '?':
+                    print(f"Status: {controller.get_status(max_age=0)}")
+                    
+                elif cmd in ['F', 'B', 'L', 'R', 'S'] or cmd.isdigit():
+                    response = controller.send_command(cmd)
+                    print(f"Response: {response}")
+                    if controller.health == "down":
+                        print("Arduino unreachable - reconnecting in the background")
+                    
+                else:
+                    print("Invalid command")
+                   
+        except KeyboardInterrupt:
+            print("\nExiting...")
+    logger.info("===== Interactive Mode Ended =====")
 
-def interactive_mode(i2c_bus=3, address=0x08):
-    """Start an interactive control mode"""
+def direct_command(command, i2c_bus=3, address=0x08, bus_factory=None, probe=True,
+                   log_level=logging.INFO):
+    """Send a direct command to the motor controller
+    
+    With probe=False, and always for "stop", the connection handshake is
+    skipped and the command is the only bus write. The connection is closed
+    afterwards but the motors keep running, as `zenbot-pi direct forward`
+    is meant to.
+    """
     logger = logging.getLogger(__name__)
-    logger.info("===== Starting Interactive Control Mode =====")
-   
-    # Create controller with the specified I2C bus and address
-    controller = MotorController(i2c_bus=i2c_bus, address=address)
-   
-    # Test communication
-    if not controller.test_communication():
-        logger.error("Failed to communicate with Arduino")
-        return
-   
-    print("\n🤖 ZenBot-Pi Interactive Control Mode 🤖")
-    print("-----------------------------")
-    print("System is always active in this version!")
-    print("Commands:")
-    print("  F - Move Forward")
-    print("  B - Move Backward")
-    print("  L - Turn Left")
-    print("  R - Turn Right")
-    print("  S - Stop")
-    print("  0-9 - Set Speed")
-    print("  ? - Get Status")
-    print("  Q - Quit")
-    print("")
-   
-    try:
-        while True:
-            cmd = input("Enter command: ").strip().upper()
-           
-            if cmd == 'Q':
-                break
-            
-            elif cmd == '?':
-                print("Status: ACTIVE")
-                controller.send_command(cmd)
-                
-            elif cmd in ['F', 'B', 'L', 'R', 'S'] or cmd.isdigit():
-                response = controller.send_command(cmd)
-                print(f"Response: {response}")
+    logger.info(f"Sending direct command: {command}")
+    
+    # An emergency stop must not wait for the handshake
+    probe = probe and command != "stop"
+    controller = MotorController(i2c_bus=i2c_bus, address=address, bus_factory=bus_factory,
+                                 probe=probe, log_level=log_level)
+    
+    # Close without stopping, even on an exception
+    with contextlib.closing(controller):
+        try:
+            # Test communication
+            if probe and not controller.test_communication():
+                logger.error("Failed to communicate with Arduino")
+                return
                 
+            # Send the command
+            if command == "forward":
+                response = controller.forward()
+            elif command == "backward":
+                response = controller.backward()
+            elif command == "left":
+                response = controller.left()
+            elif command == "right":
+                response = controller.right()
+            elif command == "stop":
+                response = controller.stop()
+            elif command.isdigit() and 0 <= int(command) <= 9:
+                response = controller.set_speed(int(command))
+            elif command == "status":
+                response = controller.get_status()
             else:
-                print("Invalid command")
-               
-    except KeyboardInterrupt:
-        print("\nExiting...")
-    finally:
-        # Stop motors and close connection
-        controller.stop()
-        controller.close()
-        logger.info("===== Interactive Mode Ended =====")
+                print(f"Unknown command: {command}")
+                return
+                
+            print(f"Response: {response}")
+            
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
 
-def direct_command(command, i2c_bus=3, address=0x08):
-    """Send a direct command to the motor controller"""
-    logger = logging.getLogger(__name__)
-    logger.info(f"Sending direct command: {command}")
+def daemon_command(command, socket_path, fallback=None):
+    """Send a direct command through a running `zenbot-pi serve` daemon
     
-    controller = MotorController(i2c_bus=i2c_bus, address=address)
+    If the daemon can't be reached, a "stop" is still carried out by
+    calling fallback, which should write it to the bus directly. Other
+    commands are dropped.
+    """
+    from .daemon import DaemonClient
     
+    logger = logging.getLogger(__name__)
     try:
-        # Test communication
-        if not controller.test_communication():
-            logger.error("Failed to communicate with Arduino")
-            return
-            
-        # Send the command
-        if command == "forward":
-            response = controller.forward()
-        elif command == "backward":
-            response = controller.backward()
-        elif command == "left":
-            response = controller.left()
-        elif command == "right":
-            response = controller.right()
-        elif command == "stop":
-            response = controller.stop()
-        elif command.isdigit() and 0 <= int(command) <= 9:
-            response = controller.set_speed(int(command))
-        elif command == "status":
-            response = controller.get_status()
-        else:
-            print(f"Unknown command: {command}")
-            return
-            
-        print(f"Response: {response}")
-        
-    except Exception as e:
-        logger.error(f"Error: {str(e)}")
-    finally:
-        # Close connection
-        controller.close()
+        with DaemonClient(socket_path) as client:
+            response, = client.request(command)
+    except OSError as e:
+        logger.error(f"Cannot reach daemon on {socket_path}: {str(e)}")
+        if command == "stop" and fallback is not None:
+            logger.warning("Sending stop directly on the bus")
+            fallback()
+        return
+    print(f"Response: {response}")
 
 def setup_logging(level=logging.INFO):
-    """Set up logging configuration"""
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s [%(levelname)s] %(message)s',
-        handlers=[
-            logging.FileHandler("zenbot-pi.log"),
-            logging.StreamHandler(sys.stdout)
-        ]
+    """Set up logging to zenbot-pi.log and stdout
+    
+    Records are written by a background thread, so a slow SD card never
+    holds up a motor command.
+    """
+    from .logconfig import start_queue_logging
+    
+    return start_queue_logging(
+        [logging.FileHandler("zenbot-pi.log"), logging.StreamHandler(sys.stdout)],
+        level=level
     )
 
-def main():
+def _parse_direct_fast(argv):
+    """
+    Parse "[--i2c-bus N] [--address A] [--simulate] direct ACTION [--no-probe]
+    [--socket PATH]" without argparse.
+    
+    Args:
+        argv (list): Command-line arguments without the program name.
+        
+    Returns:
+        dict: Parsed options, or None if argparse has to handle the line.
+    """
+    options = {"i2c_bus": 3, "address": 0x08, "simulate": False, "probe": True, "action": None,
+               "socket": None}
+    args = iter(argv)
+    for arg in args:
+        try:
+            if arg == "--i2c-bus":
+                options["i2c_bus"] = int(next(args))
+            elif arg == "--address":
+                options["address"] = int(next(args), 0)
+            elif arg == "--simulate":
+                options["simulate"] = True
+            elif arg == "--no-probe":
+                options["probe"] = False
+            elif arg == "--socket":
+                options["socket"] = next(args)
+            elif arg == "direct" and options["action"] is None:
+                options["action"] = next(args)
+            else:
+                return None
+        except (StopIteration, ValueError):
+            return None
+    if options["action"] not in DIRECT_ACTIONS:
+        return None
+    return options
+
+def _run_direct_fast(options):
+    """One-shot direct command: no argparse, no log file, warnings only."""
+    bus_factory = None
+    if options["simulate"]:
+        from .simulation import simulated_bus_factory
+        bus_factory = simulated_bus_factory(addresses=(options["address"],))
+
+    def send(action):
+        direct_command(action, i2c_bus=options["i2c_bus"], address=options["address"],
+                       bus_factory=bus_factory, probe=options["probe"], log_level=logging.WARNING)
+
+    socket_path = options["socket"] or os.environ.get("ZENBOT_SOCKET")
+    if socket_path:
+        daemon_command(options["action"], socket_path, fallback=lambda: send("stop"))
+        return
+    send(options["action"])
+
+def main(argv=None):
     """Main CLI entry point"""
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    # Fast path for one-shot direct commands such as "zenbot-pi direct stop"
+    options = _parse_direct_fast(argv)
+    if options is not None:
+        _run_direct_fast(options)
+        return
+    
+    import argparse
     parser = argparse.ArgumentParser(
         description="ZenBot-Pi - I2C Motor Controller for Raspberry Pi/Arduino robots"
     )
@@ -190,6 +270,11 @@ def main():
         action="store_true", 
         help="Enable debug logging"
     )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="Use a simulated bus and virtual Arduino instead of real hardware"
+    )
     
     # Create subparsers for different commands
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
@@ -204,23 +289,53 @@ def main():
     direct_parser = subparsers.add_parser("direct", help="Send a direct command")
     direct_parser.add_argument(
         "action", 
-        choices=["forward", "backward", "left", "right", "stop", "0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "status"],
+        choices=DIRECT_ACTIONS,
         help="The command to send"
     )
+    direct_parser.add_argument(
+        "--no-probe",
+        action="store_true",
+        help="Skip the connection handshake and send the command in one write"
+    )
+    direct_parser.add_argument(
+        "--socket",
+        default=os.environ.get("ZENBOT_SOCKET"),
+        help="Send the command through the daemon on this socket (default: $ZENBOT_SOCKET)"
+    )
+    
+    # Daemon command
+    serve_parser = subparsers.add_parser("serve", help="Keep the bus open and accept commands on a Unix socket")
+    serve_parser.add_argument(
+        "--socket",
+        default=os.environ.get("ZENBOT_SOCKET", "/tmp/zenbot-pi.sock"),
+        help="Socket path (default: $ZENBOT_SOCKET or /tmp/zenbot-pi.sock)"
+    )
     
     # Parse arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Set up logging
     setup_logging(level=logging.DEBUG if args.debug else logging.INFO)
     
+    bus_factory = None
+    if args.simulate:
+        from .simulation import simulated_bus_factory
+        bus_factory = simulated_bus_factory(addresses=(args.address,))
+    
     # Execute the appropriate command
     if args.command == "test":
-        run_test_sequence(i2c_bus=args.i2c_bus, address=args.address)
+        run_test_sequence(i2c_bus=args.i2c_bus, address=args.address, bus_factory=bus_factory)
     elif args.command == "interactive":
-        interactive_mode(i2c_bus=args.i2c_bus, address=args.address)
+        interactive_mode(i2c_bus=args.i2c_bus, address=args.address, bus_factory=bus_factory)
+    elif args.command == "direct" and args.socket:
+        daemon_command(args.action, args.socket, fallback=lambda: direct_command(
+            "stop", i2c_bus=args.i2c_bus, address=args.address, bus_factory=bus_factory))
+    elif args.command == "serve":
+        from .daemon import serve
+        serve(args.socket, i2c_bus=args.i2c_bus, address=args.address, bus_factory=bus_factory)
     elif args.command == "direct":
-        direct_command(args.action, i2c_bus=args.i2c_bus, address=args.address)
+        direct_command(args.action, i2c_bus=args.i2c_bus, address=args.address,
+                       bus_factory=bus_factory, probe=not args.no_probe)
     else:
         # Default to interactive mode if no command specified
         print("\nZenBot-Pi Motor Controller")
@@ -229,9 +344,9 @@ def main():
         choice = input("Select an option (1/2): ").strip()
        
         if choice == '1':
-            run_test_sequence(i2c_bus=args.i2c_bus, address=args.address)
+            run_test_sequence(i2c_bus=args.i2c_bus, address=args.address, bus_factory=bus_factory)
         elif choice == '2':
-            interactive_mode(i2c_bus=args.i2c_bus, address=args.address)
+            interactive_mode(i2c_bus=args.i2c_bus, address=args.address, bus_factory=bus_factory)
         else:
             print("Invalid choice")
 
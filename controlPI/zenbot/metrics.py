@@ -0,0 +1,267 @@
+"""
+Bus transaction metrics: per-command counters, write-latency histograms and exporters.
+"""
+import bisect
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in nanoseconds (50 us to 100 ms)
+DEFAULT_BUCKETS_NS = (
+    50000, 100000, 250000, 500000, 1000000, 2500000,
+    5000000, 10000000, 25000000, 50000000, 100000000,
+)
+
+
+class Metrics:
+    """Thread-safe counters and latency histograms for one or more controllers.
+
+    Pass an instance as ``MotorController(metrics=...)``. Controllers built
+    without one skip all timing and bookkeeping. Counters are shared by all
+    controllers; each controller's gauges carry its bus and address labels.
+    """
+
+    def __init__(self, sink=None, labels=None, buckets_ns=DEFAULT_BUCKETS_NS):
+        """
+        Initialize empty metrics.
+
+        Args:
+            sink: Exporter used by export(), e.g. MemorySink, PrometheusFileSink
+                or JsonLinesSink (default: None).
+            labels (dict): Constant labels added to every exported series.
+            buckets_ns (tuple): Sorted histogram bucket upper bounds in nanoseconds.
+        """
+        self.sink = sink
+        self.labels = dict(labels or {})
+        self.buckets_ns = tuple(buckets_ns)
+        self._lock = threading.Lock()
+        self._commands = collections.Counter()
+        self._errors = collections.Counter()
+        self._retries = 0
+        self._histograms = {}
+        self._gauges = {}
+
+    def record_write(self, command, latency_ns):
+        """
+        Count one successful bus transaction and its latency.
+
+        Args:
+            command (str): Command character or frame name.
+            latency_ns (int): Transaction time from time.perf_counter_ns().
+        """
+        index = bisect.bisect_left(self.buckets_ns, latency_ns)
+        with self._lock:
+            self._commands[command] += 1
+            hist = self._histograms.get(command)
+            if hist is None:
+                # Bucket counts (last one is +Inf), sum in ns
+                hist = self._histograms[command] = [[0] * (len(self.buckets_ns) + 1), 0]
+            hist[0][index] += 1
+            hist[1] += latency_ns
+
+    def record_error(self, command):
+        """
+        Count one failed bus transaction.
+
+        Args:
+            command (str): Command character or frame name.
+        """
+        with self._lock:
+            self._errors[command] += 1
+
+    def record_retry(self):
+        """Count one retried transaction or reconnect attempt."""
+        with self._lock:
+            self._retries += 1
+
+    def set_gauge(self, name, read, labels=None):
+        """
+        Register a gauge sampled on every snapshot.
+
+        Gauges with the same name but different labels are kept apart;
+        registering the same name and labels again replaces the reader.
+
+        Args:
+            name (str): Gauge name, e.g. "queue_depth".
+            read (callable): Returns the current value.
+            labels (dict): Labels for this series, e.g. {"address": "0x08"}.
+        """
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._gauges[key] = read
+
+    def snapshot(self):
+        """
+        Copy the current values.
+
+        Returns:
+            dict: timestamp, labels, commands, errors, retries, latency
+            (per command: cumulative buckets in seconds, sum, count) and gauges
+            (list of dicts with name, labels and value).
+        """
+        with self._lock:
+            commands = dict(self._commands)
+            errors = dict(self._errors)
+            retries = self._retries
+            histograms = {k: (list(v[0]), v[1]) for k, v in self._histograms.items()}
+            gauges = list(self._gauges.items())
+
+        latency = {}
+        for command, (counts, total_ns) in histograms.items():
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(self.buckets_ns + (None,), counts):
+                cumulative += count
+                buckets.append([None if bound is None else bound / 1e9, cumulative])
+            latency[command] = {"buckets": buckets, "sum": total_ns / 1e9, "count": cumulative}
+
+        values = []
+        for (name, labels), read in gauges:
+            try:
+                values.append({"name": name, "labels": dict(labels), "value": read()})
+            except Exception as e:
+                logger.error(f"Gauge {name} failed: {str(e)}")
+        return {
+            "timestamp": time.time(),
+            "labels": dict(self.labels),
+            "commands": commands,
+            "errors": errors,
+            "retries": retries,
+            "latency": latency,
+            "gauges": values,
+        }
+
+    def export(self):
+        """
+        Send a snapshot to the sink.
+
+        Returns:
+            dict: The exported snapshot.
+        """
+        snapshot = self.snapshot()
+        if self.sink is not None:
+            self.sink.emit(snapshot)
+        return snapshot
+
+
+class MemorySink:
+    """Keeps the most recent snapshots in memory."""
+
+    def __init__(self, maxlen=100):
+        """
+        Args:
+            maxlen (int): Number of snapshots to keep (default: 100).
+        """
+        self.snapshots = collections.deque(maxlen=maxlen)
+
+    @property
+    def latest(self):
+        """dict: The last exported snapshot, or None."""
+        return self.snapshots[-1] if self.snapshots else None
+
+    def emit(self, snapshot):
+        self.snapshots.append(snapshot)
+
+
+class JsonLinesSink:
+    """Appends each snapshot as one JSON line to a file."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): File to append to.
+        """
+        self.path = path
+
+    def emit(self, snapshot):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+
+
+class PrometheusFileSink:
+    """Writes snapshots in the Prometheus text format, e.g. for the
+    node_exporter textfile collector. The file is replaced atomically."""
+
+    def __init__(self, path, prefix="zenbot"):
+        """
+        Args:
+            path (str): File to write, usually ending in ``.prom``.
+            prefix (str): Metric name prefix (default: "zenbot").
+        """
+        self.path = path
+        self.prefix = prefix
+
+    @staticmethod
+    def _labels(base, **extra):
+        labels = dict(base, **extra)
+        if not labels:
+            return ""
+        parts = ",".join(
+            '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+            for k, v in sorted(labels.items())
+        )
+        return "{" + parts + "}"
+
+    def render(self, snapshot):
+        """
+        Format a snapshot as Prometheus text.
+
+        Args:
+            snapshot (dict): A Metrics.snapshot() result.
+
+        Returns:
+            str: The exposition text.
+        """
+        p = self.prefix
+        base = snapshot["labels"]
+        lines = [
+            f"# HELP {p}_commands_total Successful bus transactions by command.",
+            f"# TYPE {p}_commands_total counter",
+        ]
+        for command, count in sorted(snapshot["commands"].items()):
+            lines.append(f"{p}_commands_total{self._labels(base, command=command)} {count}")
+
+        lines += [
+            f"# HELP {p}_errors_total Failed bus transactions by command.",
+            f"# TYPE {p}_errors_total counter",
+        ]
+        for command, count in sorted(snapshot["errors"].items()):
+            lines.append(f"{p}_errors_total{self._labels(base, command=command)} {count}")
+
+        lines += [
+            f"# HELP {p}_retries_total Retried transactions and reconnect attempts.",
+            f"# TYPE {p}_retries_total counter",
+            f"{p}_retries_total{self._labels(base)} {snapshot['retries']}",
+            f"# HELP {p}_write_latency_seconds Bus write latency.",
+            f"# TYPE {p}_write_latency_seconds histogram",
+        ]
+        for command, hist in sorted(snapshot["latency"].items()):
+            for bound, count in hist["buckets"]:
+                le = "+Inf" if bound is None else repr(bound)
+                lines.append(f"{p}_write_latency_seconds_bucket"
+                             f"{self._labels(base, command=command, le=le)} {count}")
+            lines.append(f"{p}_write_latency_seconds_sum"
+                         f"{self._labels(base, command=command)} {hist['sum']!r}")
+            lines.append(f"{p}_write_latency_seconds_count"
+                         f"{self._labels(base, command=command)} {hist['count']}")
+
+        typed = set()
+        for gauge in sorted(snapshot["gauges"], key=lambda g: (g["name"], sorted(g["labels"].items()))):
+            name = gauge["name"]
+            if name not in typed:
+                # One TYPE line per metric, before all of its series
+                typed.add(name)
+                lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name}{self._labels(base, **gauge['labels'])} {gauge['value']}")
+        return "\n".join(lines) + "\n"
+
+    def emit(self, snapshot):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render(snapshot))
+        os.replace(tmp_path, self.path)
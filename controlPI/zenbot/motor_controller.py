@@ -2,14 +2,57 @@ import smbus2
 import time
 import logging
 import sys
+import threading
+
+from .breaker import CLOSED, HALF_OPEN, CircuitBreaker, CircuitOpenError
+from .heartbeat import Heartbeat
+from .kinematics import MAX_WHEEL_SPEED, WHEEL_BASE, velocity_to_pwm
+from .pipeline import CONTROL, SAFETY, TELEMETRY, CommandPipeline
+from .protocol import (FRAME_MAGIC, MAX_PLAN_STEPS, OP_DRIVE, OP_MOVE, OP_PLAN_LOAD,
+                       OP_PLAN_RUN, OP_RAMP, OP_SPEED, OP_STOP, OPCODE_NAMES,
+                       PLAN_STEPS_PER_FRAME, RAMP_PROFILES, STATUS_SIZE,
+                       FrameEncoder, decode_status, ramp_pwm, speed_level_to_pwm)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+_MOVE_BYTES = frozenset(b'FBLR')
+_SPEED_BYTES = frozenset(b'0123456789')
+_TELEMETRY_BYTES = frozenset(b'?X')
+
+# The sketch stops the motors after this long without a command
+WATCHDOG_TIMEOUT = 15.0
+
+# Plan step command names accepted by execute()
+_PLAN_COMMANDS = {
+    'forward': 'F', 'backward': 'B', 'left': 'L', 'right': 'R', 'stop': 'S',
+    'F': 'F', 'B': 'B', 'L': 'L', 'R': 'R', 'S': 'S',
+}
+
 class MotorController:
-    """I2C motor controller for Arduino communication"""
+    """I2C motor controller for Arduino communication
+    
+    A controller may be shared between threads. Every bus transaction,
+    including frame encoding into the shared buffers, runs in one short
+    critical section under the bus lock; the wait for command_interval
+    happens before it, with no lock held. In direct mode, commands from
+    one thread reach the bus in call order, and commands from different
+    threads are interleaved in the order they win the lock. In pipelined
+    mode, order is kept only within a priority class: a stop jumps ahead
+    of queued motion (and cancels it), motion and setpoints go next, and
+    status requests and keepalives are written last; a replaced setpoint
+    is dropped. close() may run concurrently with senders, which then get
+    an "ERROR: ..." response instead of touching a closed bus.
+    """
    
-    def __init__(self, i2c_bus=3, address=0x08, log_level=logging.INFO):
+    def __init__(self, i2c_bus=3, address=0x08, log_level=logging.INFO,
+                 command_interval=0.02, pipelined=False, queue_size=32,
+                 bus=None, bus_lock=None, probe=True, protocol="ascii",
+                 status_ttl=0.25, keepalive=False, keepalive_interval=12.0,
+                 coalesce=False, metrics=None, bus_factory=None, rate_limit=None,
+                 burst=1, reconnect=True, failure_threshold=3, reconnect_delay=0.25,
+                 max_reconnect_delay=8.0, wheel_base=WHEEL_BASE,
+                 max_wheel_speed=MAX_WHEEL_SPEED):
         """
         Initialize the motor controller.
         
@@ -17,23 +60,135 @@ class MotorController:
             i2c_bus (int): The I2C bus number to use (default: 3).
             address (int): The I2C address of the Arduino (default: 0x08).
             log_level (int): Logging level (default: logging.INFO).
+            command_interval (float): Minimum gap in seconds between two bus
+                writes, giving the Arduino time to run receiveEvent (default: 0.02).
+            pipelined (bool): Queue commands for a background writer instead of
+                writing them from the calling thread. Stops jump the queue and
+                cancel pending moves; keepalives and probes go last (default: False).
+            queue_size (int): Maximum number of pending commands in pipelined mode (default: 32).
+            bus (SMBus): An already open bus shared with other controllers. The
+                controller uses it instead of opening its own and never closes it.
+            bus_lock (threading.Lock): Lock serializing transactions on a shared bus.
+            probe (bool): Send a status probe and wait for the Arduino to
+                settle when connecting (default: True).
+            protocol (str): "ascii" sends one character per command; "binary"
+                sends versioned multi-byte frames, so a direction and speed go
+                out in one transaction (default: "ascii").
+            status_ttl (float): Seconds a status snapshot read by get_status()
+                is reused before the bus is read again (default: 0.25).
+            keepalive (bool): Send a no-op ('X') while the motors are running
+                and the link has been idle for keepalive_interval seconds, so
+                long moves survive the sketch's 15 s watchdog (default: False).
+            keepalive_interval (float): Idle seconds before a keepalive is sent (default: 12.0).
+            coalesce (bool): Skip direction and speed commands that repeat
+                what was last sent. Stops always go out. The host cannot see
+                a stop from the Arduino's button, so a repeated move after a
+                button stop is skipped too; leave this off if that matters
+                (default: False).
+            metrics (Metrics): Collects per-command counts, write latency,
+                errors and queue depth (default: None, no instrumentation).
+            bus_factory (callable): Opens a bus given its number, e.g. a
+                zenbot.simulation factory for hardware-free runs (default: smbus2.SMBus).
+            rate_limit (float): Sustained writes per second in pipelined mode;
+                stops are exempt (default: None, only command_interval applies).
+            burst (int): Writes rate_limit lets through back to back (default: 1).
+            reconnect (bool): After failure_threshold consecutive I/O errors,
+                fail fast without touching the bus and periodically reopen it
+                and retry, with exponential backoff (default: True).
+            failure_threshold (int): Consecutive errors before failing fast (default: 3).
+            reconnect_delay (float): Seconds before the first reconnect attempt (default: 0.25).
+            max_reconnect_delay (float): Longest delay between attempts (default: 8.0).
+            wheel_base (float): Distance between the wheels in m, for set_velocity() (default: 0.15).
+            max_wheel_speed (float): Wheel speed in m/s at full PWM, for
+                set_velocity() (default: 0.5).
         """
+        if protocol not in ("ascii", "binary"):
+            raise ValueError(f"Unknown protocol: {protocol}")
         # Set up logging if it hasn't been configured
         self._setup_logging(log_level)
         
         self.i2c_bus = i2c_bus
         self.address = address
         self.bus = None
+        self.command_interval = command_interval
+        self.probe = probe
+        self.protocol = protocol
+        # PWM the sketch applies to movement commands (its boot default)
+        self.speed_pwm = 200
+        self.wheel_base = wheel_base
+        self.max_wheel_speed = max_wheel_speed
+        self._encoder = FrameEncoder()
+        self.status_ttl = status_ttl
+        self._status = None
+        self._status_lock = threading.Lock()
+        self._plan_cancel = threading.Event()
         # System is always active in this version
         self.system_active = True 
+        self._shared_bus = bus
+        self._bus_factory = bus_factory if bus_factory is not None else smbus2.SMBus
+        self._bus_lock = bus_lock if bus_lock is not None else threading.Lock()
+        self._last_write = 0.0
+        # Direct mode: earliest time the next write slot may be handed out
+        self._next_slot = 0.0
+        self._pace_lock = threading.Lock()
+        self._close_lock = threading.Lock()
+        self._moving = False
+        # End of a timed drive or plan that stops by itself, or None
+        self._moving_until = None
+        # Steps stored on the Arduino by PLAN_LOAD frames
+        self._loaded_plan = [None] * MAX_PLAN_STEPS
+        self.coalesce = coalesce
+        self.writes_saved = 0
+        self._sent_state = {}
+        self._coalesce_lock = threading.Lock()
+        self._metrics = metrics
+        self._pipeline = None
+        self._heartbeat = None
+        self._closed = False
+        self._breaker = None
+        if reconnect:
+            self._breaker = CircuitBreaker(failure_threshold, reconnect_delay, max_reconnect_delay)
         logger.info(f"Initializing MotorController on I2C bus {i2c_bus}, address 0x{address:02X}")
         self.connect()
+        if pipelined:
+            self._pipeline = CommandPipeline(
+                self._transmit, maxsize=queue_size, min_interval=command_interval,
+                rate=rate_limit, burst=burst
+            )
+        if keepalive:
+            self._heartbeat = Heartbeat(
+                self._send_keepalive, lambda: self._last_write,
+                idle_after=keepalive_interval, should_beat=self._motors_running
+            )
+        if metrics is not None:
+            # Labelled per robot, so controllers sharing one Metrics don't overwrite each other
+            labels = {"bus": str(i2c_bus), "address": f"0x{address:02X}"}
+            metrics.set_gauge("queue_depth", lambda: self.queue_depth, labels)
+            metrics.set_gauge("writes_saved", lambda: self.writes_saved, labels)
+            metrics.set_gauge("commands_cancelled", lambda: self.commands_cancelled, labels)
+            metrics.set_gauge("setpoints_replaced", lambda: self.setpoints_replaced, labels)
+            metrics.set_gauge("healthy", lambda: int(self.health == "healthy"), labels)
     
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Stop even when the block raised, then release the bus
+        if not self._closed:
+            self.stop()
+        self.close()
+
+    @property
+    def closed(self):
+        """bool: True once close() has been called."""
+        return self._closed
+
     def _setup_logging(self, log_level):
         """Set up logging if not already configured."""
         logger.setLevel(log_level)
-        # Only add handler if logger doesn't have one
-        if not logger.handlers:
+        # Only add a handler if neither this logger nor an ancestor has one,
+        # e.g. the background writer installed by zenbot-pi's setup_logging
+        if not logger.hasHandlers():
             handler = logging.StreamHandler(sys.stdout)
             formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
             handler.setFormatter(formatter)
@@ -47,14 +202,23 @@ class MotorController:
             bool: True if connection successful, False otherwise.
         """
         try:
-            logger.info(f"Opening I2C bus {self.i2c_bus}")
-            self.bus = smbus2.SMBus(self.i2c_bus)
+            if self._shared_bus is not None:
+                bus = self._shared_bus
+            else:
+                logger.info(f"Opening I2C bus {self.i2c_bus}")
+                bus = self._bus_factory(self.i2c_bus)
+            with self._bus_lock:
+                self.bus = bus
+            if not self.probe:
+                return True
             
             # Test connection with a status request
             logger.info("Testing connection to Arduino...")
             try:
                 # Send a status request command
-                self.bus.write_byte(self.address, ord('?'))
+                with self._bus_lock:
+                    self.bus.write_byte(self.address, ord('?'))
+                    self._last_write = time.monotonic()
                 logger.info("I2C connection successful")
                 
                 # Wait for Arduino to stabilize
@@ -74,31 +238,410 @@ class MotorController:
         """
         Send a single character command to the Arduino.
         
+        In pipelined mode the command is queued and this returns as soon as
+        there is room in the queue; use flush() to wait for it to be written.
+        
         Args:
             cmd (str or int): The command to send. If a string, the first character is used.
             
         Returns:
             str: Response message or error message.
         """
-        if not self.bus:
+        cmd_byte = ord(cmd[0]) if isinstance(cmd, str) else cmd
+        return self._dispatch(cmd_byte)
+
+    def send_frame(self, opcode, *args):
+        """
+        Send a binary command frame to the Arduino.
+        
+        Args:
+            opcode (int): One of the zenbot.protocol OP_* opcodes.
+            *args: Payload values for the opcode's FrameEncoder method.
+            
+        Returns:
+            str: Response message or error message.
+        """
+        if opcode not in OPCODE_NAMES:
+            logger.error(f"Unknown frame opcode: 0x{opcode:02X}")
+            return f"ERROR: Unknown frame opcode 0x{opcode:02X}"
+        return self._dispatch((opcode,) + args)
+
+    def _dispatch(self, item, replace=None):
+        """
+        Queue or write one command byte or frame tuple.
+        
+        Args:
+            item (int or tuple): A command byte, or (opcode, *payload) for a frame.
+            replace (callable): In pipelined mode, item replaces the command
+                waiting at the tail of the queue if this returns True for it,
+                e.g. a stale setpoint (default: None).
+            
+        Returns:
+            str: Response message or error message.
+        """
+        if not self.bus and (self._breaker is None or self._closed):
             logger.error("Cannot send command - I2C bus not open")
             return "ERROR: I2C bus not open"
-           
-        # Send single character command
-        try:
-            cmd_byte = ord(cmd[0]) if isinstance(cmd, str) else cmd
-            logger.debug(f"Sending command: '{chr(cmd_byte)}' (0x{cmd_byte:02X})")
-            self.bus.write_byte(self.address, cmd_byte)
+
+        if self.coalesce and self._is_redundant(item):
+            logger.debug("Skipping redundant %s", self._describe(item))
+            return f"{self._describe(item)} skipped (no change)"
+
+        if self._pipeline is not None:
+            if self._is_stop(item):
+                queued = self._pipeline.submit(item, priority=SAFETY, cancel=self._is_motion)
+            elif item in _TELEMETRY_BYTES:
+                queued = self._pipeline.submit(item, priority=TELEMETRY)
+            else:
+                queued = self._pipeline.submit(item, priority=CONTROL, replace=replace)
+            if not queued:
+                logger.error("Cannot queue command - pipeline closed")
+                return "ERROR: Command pipeline closed"
+            return f"{self._describe(item)} queued"
+
+        # Keep the minimum gap: reserve the next write slot, then wait for
+        # it without holding a lock, so other threads can reserve theirs
+        interval = self.command_interval
+        if interval > 0:
+            with self._pace_lock:
+                now = time.monotonic()
+                slot = max(now, self._last_write + interval, self._next_slot)
+                self._next_slot = slot + interval
+            if slot > now:
+                time.sleep(slot - now)
+        return self._transmit(item)
+
+    def _is_redundant(self, item):
+        """
+        Check an outgoing command against the last sent direction and speed.
+        
+        Records the command as sent when it is not redundant.
+        
+        Args:
+            item (int or tuple): A command byte, or (opcode, *payload) for a frame.
+            
+        Returns:
+            bool: True if sending it would change nothing on the Arduino.
+        """
+        slot = value = None
+        if isinstance(item, int):
+            if item in _MOVE_BYTES:
+                slot, value = "direction", item
+            elif item in _SPEED_BYTES:
+                slot, value = "speed", item
+        elif item[0] == OP_DRIVE and not (len(item) > 3 and item[3]):
+            slot, value = "direction", item[1:3]
+        elif item[0] == OP_SPEED:
+            slot, value = "speed", item
+        elif item[0] == OP_MOVE and item[2] is None:
+            # Same state as the movement character
+            slot, value = "direction", ord(item[1])
+
+        with self._coalesce_lock:
+            if time.monotonic() - self._last_write >= WATCHDOG_TIMEOUT:
+                # The watchdog may have stopped the motors since
+                self._sent_state.pop("direction", None)
+            if slot is None:
+                if item == ord('S') or (isinstance(item, tuple) and item[0] == OP_STOP):
+                    self._sent_state["direction"] = "stop"
+                elif isinstance(item, tuple) and item[0] in (OP_DRIVE, OP_PLAN_LOAD, OP_PLAN_RUN,
+                                                             OP_RAMP, OP_MOVE):
+                    # Timed drives, plans and ramps change state on their own;
+                    # a move with a speed level sets both direction and speed
+                    self._sent_state.clear()
+                return False
+            if self._sent_state.get(slot) == value:
+                self.writes_saved += 1
+                return True
+            self._sent_state[slot] = value
+            return False
+
+    def _record_external(self, cmd_byte):
+        """Remember a command byte written around this controller, e.g. by BusManager.broadcast()."""
+        with self._coalesce_lock:
+            if cmd_byte == ord('S'):
+                self._sent_state["direction"] = "stop"
+            elif cmd_byte in _MOVE_BYTES:
+                self._sent_state["direction"] = cmd_byte
+            elif cmd_byte in _SPEED_BYTES:
+                self._sent_state["speed"] = cmd_byte
+
+    @staticmethod
+    def _is_stop(item):
+        """Check whether a command byte or frame tuple stops the motors."""
+        if isinstance(item, int):
+            return item == ord('S')
+        return item[0] == OP_STOP
+
+    @staticmethod
+    def _is_motion(item):
+        """Check whether a command byte or frame tuple sets the motors running."""
+        if isinstance(item, int):
+            return item in _MOVE_BYTES
+        return item[0] in (OP_DRIVE, OP_MOVE, OP_PLAN_LOAD, OP_PLAN_RUN)
+
+    @staticmethod
+    def _is_setpoint(item):
+        """Check whether a command is an untimed drive frame, which the next one supersedes."""
+        return (isinstance(item, tuple) and item[0] == OP_DRIVE
+                and not (len(item) > 3 and item[3]))
+
+    @staticmethod
+    def _is_speed_step(item):
+        """Check whether a command only sets the speed, which the next ramp step supersedes."""
+        if isinstance(item, int):
+            return item in _SPEED_BYTES
+        return item[0] == OP_SPEED
+
+    @property
+    def commands_cancelled(self):
+        """int: Queued moves dropped because a stop superseded them."""
+        return self._pipeline.cancelled if self._pipeline is not None else 0
+
+    @property
+    def setpoints_replaced(self):
+        """int: Queued set_velocity() setpoints overwritten by a newer one."""
+        return self._pipeline.replaced if self._pipeline is not None else 0
+
+    @property
+    def metrics(self):
+        """Metrics: The attached metrics collector, or None."""
+        return self._metrics
+
+    @property
+    def queue_depth(self):
+        """int: Commands waiting for the pipelined writer (0 when not pipelined)."""
+        return self._pipeline.pending if self._pipeline is not None else 0
+
+    @staticmethod
+    def _label(item):
+        """Metrics label of a command byte or frame tuple."""
+        if isinstance(item, int):
+            return chr(item)
+        return OPCODE_NAMES[item[0]]
+
+    @staticmethod
+    def _describe(item):
+        """Human-readable name of a command byte or frame tuple."""
+        if isinstance(item, int):
+            return f"Command '{chr(item)}'"
+        return f"Frame {OPCODE_NAMES[item[0]]}"
+
+    def _encode(self, item):
+        """Encode a frame tuple into its body with the preallocated encoder."""
+        opcode = item[0]
+        if opcode == OP_DRIVE:
+            return self._encoder.drive(*item[1:])
+        if opcode == OP_SPEED:
+            return self._encoder.speed(*item[1:])
+        if opcode == OP_PLAN_LOAD:
+            return self._encoder.plan_load(*item[1:])
+        if opcode == OP_PLAN_RUN:
+            return self._encoder.plan_run(*item[1:])
+        if opcode == OP_RAMP:
+            return self._encoder.ramp(*item[1:])
+        if opcode == OP_MOVE:
+            return self._encoder.move(*item[1:])
+        return self._encoder.stop()
+
+    def _transmit(self, item):
+        """
+        Write one command byte or frame to the bus.
+        
+        Args:
+            item (int or tuple): A command byte, or (opcode, *payload) for a frame.
             
-            # Wait a moment for Arduino to process
-            time.sleep(0.2)
+        Returns:
+            str: Response message or error message.
+        """
+        try:
+            if isinstance(item, int):
+                logger.debug("Sending command: %r (0x%02X)", chr(item), item)
+            else:
+                logger.debug("Sending frame: %s", item)
+            metrics = self._metrics
+            breaker = self._breaker
+            # Skip the breaker bookkeeping while all is well
+            settled = breaker is None or (breaker.state == CLOSED and not breaker.failures)
+            if not settled:
+                self._check_breaker()
+            with self._bus_lock:
+                if not settled or self.bus is None:
+                    self._reopen_if_due()
+                if not self.bus:
+                    return "ERROR: I2C bus not open"
+                if metrics is not None:
+                    started = time.perf_counter_ns()
+                if isinstance(item, int):
+                    self.bus.write_byte(self.address, item)
+                else:
+                    self.bus.write_i2c_block_data(self.address, FRAME_MAGIC, self._encode(item))
+                if metrics is not None:
+                    metrics.record_write(self._label(item), time.perf_counter_ns() - started)
+                self._last_write = time.monotonic()
+                # Any command may change what the Arduino would report
+                self._status = None
+                self._track_motion(item)
+            if not settled:
+                self._transaction_succeeded()
             
             # No direct response over I2C unless we implement a request mechanism
-            return f"Command '{chr(cmd_byte)}' sent successfully"
-               
+            return f"{self._describe(item)} sent successfully"
+        
+        except CircuitOpenError as e:
+            logger.debug("Not sending %s: %s", self._describe(item), e)
+            with self._coalesce_lock:
+                self._sent_state.clear()
+            return f"ERROR: {str(e)}"
         except Exception as e:
-            logger.error(f"Error sending command: {str(e)}")
+            logger.error("Error sending command: %s", e)
+            self._transaction_failed(e)
+            if self._metrics is not None:
+                self._metrics.record_error(self._label(item))
+            # Don't trust the remembered state after a failed write
+            with self._coalesce_lock:
+                self._sent_state.clear()
             return f"ERROR: {str(e)}"
+
+    # Circuit breaker hooks around each bus transaction; cheap while the circuit is closed
+    def _check_breaker(self):
+        """
+        Refuse a transaction without touching the bus while the circuit is open.
+        
+        Raises:
+            CircuitOpenError: If the transaction may not run now.
+        """
+        breaker = self._breaker
+        if breaker is not None and breaker.state != CLOSED and not breaker.allow():
+            raise CircuitOpenError(f"Arduino unreachable, retrying in {breaker.retry_in:.2f}s")
+
+    def _reopen_if_due(self):
+        """Reopen the bus for the breaker's trial, or if it isn't open. Call with the bus lock held."""
+        breaker = self._breaker
+        if (breaker is not None and not self._closed
+                and (self.bus is None or breaker.state == HALF_OPEN)):
+            self._reopen()
+
+    def _transaction_succeeded(self):
+        """Close the circuit after errors or a successful trial."""
+        breaker = self._breaker
+        if breaker is not None and (breaker.failures or breaker.state != CLOSED):
+            if breaker.record_success():
+                logger.info("I2C connection restored")
+
+    def _transaction_failed(self, error):
+        """Count a failed transaction towards opening the circuit.
+
+        Only bus errors count while closed. A failed half-open trial counts
+        whatever the error (e.g. a garbled status read), or no caller would
+        ever be let through again.
+        """
+        breaker = self._breaker
+        if breaker is None or not (isinstance(error, OSError) or breaker.state == HALF_OPEN):
+            return
+        if breaker.record_failure():
+            logger.warning(f"Arduino at 0x{self.address:02X} unreachable ({str(error)}), "
+                           f"next attempt in {breaker.retry_in:.2f}s")
+
+    def _reopen(self):
+        """Replace the bus handle with a freshly opened one. Call with the bus lock held."""
+        if self._metrics is not None:
+            self._metrics.record_retry()
+        if self._shared_bus is not None:
+            # A shared handle belongs to its BusManager; just retry on it
+            self.bus = self._shared_bus
+            return
+        logger.info(f"Reopening I2C bus {self.i2c_bus}")
+        if self.bus is not None:
+            try:
+                self.bus.close()
+            except Exception as e:
+                logger.debug(f"Error closing stale bus handle: {str(e)}")
+            self.bus = None
+        self.bus = self._bus_factory(self.i2c_bus)
+
+    @property
+    def health(self):
+        """str: "healthy", "degraded" (recent errors) or "down" (failing fast, no open bus, or closed)."""
+        if self._closed or self.bus is None:
+            return "down"
+        if self._breaker is None:
+            return "healthy"
+        if self._breaker.state != CLOSED:
+            return "down"
+        return "degraded" if self._breaker.failures else "healthy"
+
+    def _track_motion(self, item):
+        """Record whether the command just written leaves the motors running, and until when."""
+        if isinstance(item, int):
+            if item in _TELEMETRY_BYTES:
+                return
+            # Any other command ends a timed drive or plan on the Arduino
+            self._moving_until = None
+            if item in _MOVE_BYTES:
+                self._moving = True
+            elif item == ord('S'):
+                self._moving = False
+            return
+        self._moving_until = None
+        opcode = item[0]
+        if opcode == OP_DRIVE:
+            self._moving = bool(item[1] or item[2])
+            if self._moving and len(item) > 3 and item[3]:
+                self._moving_until = time.monotonic() + item[3] / 1000.0
+        elif opcode == OP_STOP:
+            self._moving = False
+        elif opcode == OP_MOVE:
+            self._moving = True
+        elif opcode == OP_PLAN_LOAD:
+            index, steps = item[1], item[2]
+            self._loaded_plan[index:index + len(steps)] = steps
+        elif opcode == OP_PLAN_RUN:
+            self._moving = True
+            steps = self._loaded_plan[:item[1]]
+            if steps and all(steps) and steps[-1][0] == 'S':
+                # The motors stop when the final stop step starts
+                self._moving_until = time.monotonic() + sum(step[2] for step in steps[:-1]) / 1000.0
+
+    def _motors_running(self):
+        """Check whether the motors should still be running, e.g. to decide on a keepalive."""
+        until = self._moving_until
+        return self._moving and (until is None or time.monotonic() < until)
+
+    def _send_keepalive(self):
+        """Feed the Arduino watchdog with the cheapest no-op command."""
+        return self._dispatch(ord('X'))
+
+    @property
+    def keepalives_sent(self):
+        """int: Number of keepalive commands sent so far."""
+        return self._heartbeat.beats if self._heartbeat is not None else 0
+
+    def flush(self, timeout=None):
+        """
+        Wait until all queued commands have been written to the bus.
+        
+        Args:
+            timeout (float): Maximum time to wait in seconds, or None to wait forever.
+            
+        Returns:
+            bool: True if nothing is left pending, False on timeout.
+        """
+        if self._pipeline is None:
+            return True
+        return self._pipeline.wait_idle(timeout)
+
+    def wait_idle(self, timeout=None):
+        """
+        Alias of flush().
+        
+        Args:
+            timeout (float): Maximum time to wait in seconds, or None to wait forever.
+            
+        Returns:
+            bool: True if nothing is left pending, False on timeout.
+        """
+        return self.flush(timeout)
    
     def test_communication(self):
         """
@@ -122,54 +665,143 @@ class MotorController:
             return False
    
     # Movement commands
-    def forward(self):
+    def _move(self, cmd, speed):
+        """
+        Send a movement command, optionally changing speed in the same call.
+        
+        Args:
+            cmd (str): One of 'F', 'B', 'L' or 'R'.
+            speed (int): Speed level (0-9), or None to keep the current speed.
+            
+        Returns:
+            str: Response message or error message.
+        """
+        if speed is not None and not 0 <= speed <= 9:
+            logger.error(f"Invalid speed level: {speed} (must be 0-9)")
+            return "ERROR: Invalid speed level (must be 0-9)"
+        if self.protocol == "binary":
+            # A MOVE frame, not a DRIVE frame: the Arduino drives it at its
+            # movement PWM, so speed frames and ramps apply as with 'F'
+            if speed is not None:
+                self.speed_pwm = speed_level_to_pwm(speed)
+            return self.send_frame(OP_MOVE, cmd, speed)
+        if speed is not None:
+            response = self.set_speed(speed)
+            if response.startswith("ERROR"):
+                return response
+        return self.send_command(cmd)
+
+    def drive(self, left, right, duration_ms=0):
+        """
+        Drive each wheel at its own signed PWM in a single frame.
+        
+        Requires the frame-capable sketch regardless of the protocol setting.
+        
+        Args:
+            left (int): Left wheel PWM from -255 (full reverse) to 255 (full forward).
+            right (int): Right wheel PWM from -255 to 255.
+            duration_ms (int): Let the Arduino stop after this many milliseconds, or 0 to hold.
+            
+        Returns:
+            str: Response message or error message.
+        """
+        logger.debug("Driving left=%s right=%s for %s ms", left, right, duration_ms)
+        return self.send_frame(OP_DRIVE, left, right, duration_ms)
+
+    def set_velocity(self, linear, angular=0.0):
+        """
+        Drive at a body velocity, sent as one frame with per-wheel PWM.
+        
+        Meant to be called from a control loop, typically at 20-50 Hz. In
+        pipelined mode a setpoint still waiting for the bus is replaced by
+        the newer one, so the writer always sends the latest value and never
+        falls behind; command_interval and rate_limit cap the bus rate.
+        Requires the frame-capable sketch regardless of the protocol setting.
+        
+        Args:
+            linear (float): Forward speed in m/s (negative reverses).
+            angular (float): Turn rate in rad/s, positive to the left (default: 0.0).
+            
+        Returns:
+            str: Response message or error message.
+        """
+        left, right = velocity_to_pwm(linear, angular, self.wheel_base, self.max_wheel_speed)
+        logger.debug("Velocity %.3f m/s %.3f rad/s -> left=%d right=%d", linear, angular, left, right)
+        return self._dispatch((OP_DRIVE, left, right, 0), replace=self._is_setpoint)
+
+    def forward(self, *, speed=None):
         """
         Move forward.
         
+        Args:
+            speed (int): Optional speed level (0-9) to apply with the move.
+            
         Returns:
             str: Response message.
         """
         logger.info("Moving forward")
-        return self.send_command('F')
+        return self._move('F', speed)
    
-    def backward(self):
+    def backward(self, *, speed=None):
         """
         Move backward.
         
+        Args:
+            speed (int): Optional speed level (0-9) to apply with the move.
+            
         Returns:
             str: Response message.
         """
         logger.info("Moving backward")
-        return self.send_command('B')
+        return self._move('B', speed)
    
-    def left(self):
+    def left(self, *, speed=None):
         """
         Turn left.
         
+        Args:
+            speed (int): Optional speed level (0-9) to apply with the turn.
+            
         Returns:
             str: Response message.
         """
         logger.info("Turning left")
-        return self.send_command('L')
+        return self._move('L', speed)
    
-    def right(self):
+    def right(self, *, speed=None):
         """
         Turn right.
         
+        Args:
+            speed (int): Optional speed level (0-9) to apply with the turn.
+            
         Returns:
             str: Response message.
         """
         logger.info("Turning right")
-        return self.send_command('R')
+        return self._move('R', speed)
    
     def stop(self):
         """
-        Stop all motors.
+        Stop all motors. Also aborts a plan running in execute().
         
         Returns:
             str: Response message.
         """
         logger.info("Stopping motors")
+        self._plan_cancel.set()
+        return self._stop()
+
+    def _cancel_motion(self):
+        """Abort host-timed motion and drop queued moves, ahead of a stop written by someone else."""
+        self._plan_cancel.set()
+        if self._pipeline is not None:
+            self._pipeline.cancel(self._is_motion)
+
+    def _stop(self):
+        """Send the stop command without touching a running plan."""
+        if self.protocol == "binary":
+            return self.send_frame(OP_STOP)
         return self.send_command('S')
    
     def set_speed(self, level):
@@ -183,21 +815,282 @@ class MotorController:
             str: Response message or error message.
         """
         if 0 <= level <= 9:
-            logger.info(f"Setting speed to level {level}")
+            logger.info("Setting speed to level %d", level)
+            self.speed_pwm = speed_level_to_pwm(level)
+            if self.protocol == "binary":
+                return self.send_frame(OP_SPEED, self.speed_pwm)
             return self.send_command(str(level))
         else:
             logger.error(f"Invalid speed level: {level} (must be 0-9)")
             return "ERROR: Invalid speed level (must be 0-9)"
    
-    def get_status(self):
+    def ramp_speed(self, level, duration, profile="linear", upload=True, rate=50.0):
         """
-        Get system status (always on).
+        Change the speed level gradually instead of in one step.
+        
+        With upload=True a single RAMP frame lets the Arduino ramp the PWM
+        itself and this returns immediately. Otherwise the host sends a
+        speed step every 1/rate seconds on a monotonic schedule and returns
+        when the ramp is done; in pipelined mode a step still waiting for
+        the bus is replaced by the next one. stop() aborts a host ramp.
+        The ramp sets the PWM of forward(), backward(), left() and right();
+        drive frames set the wheels directly and end an onboard ramp.
         
+        Args:
+            level (int): Target speed level (0-9).
+            duration (float): Ramp time in seconds.
+            profile (str): "linear" or "s-curve" (default: "linear").
+            upload (bool): Let the Arduino run the ramp (default: True).
+            rate (float): Host ramp steps per second (default: 50.0).
+            
         Returns:
-            str: Response message.
+            str: Response message or error message.
         """
-        logger.info("Requesting system status")
-        return self.send_command('?')
+        if not 0 <= level <= 9:
+            logger.error(f"Invalid speed level: {level} (must be 0-9)")
+            return "ERROR: Invalid speed level (must be 0-9)"
+        if profile not in RAMP_PROFILES:
+            logger.error(f"Unknown ramp profile: {profile}")
+            return f"ERROR: Unknown ramp profile {profile!r}"
+        if not 0 <= duration <= 65.535:
+            logger.error(f"Invalid ramp duration: {duration} s")
+            return "ERROR: Ramp duration must be 0-65.535 s"
+        shape = RAMP_PROFILES[profile]
+        start = self.speed_pwm
+        target = speed_level_to_pwm(level)
+        logger.info("Ramping speed to level %d over %.2f s (%s)", level, duration, profile)
+        if upload:
+            response = self.send_frame(OP_RAMP, target, round(duration * 1000), shape)
+            if not response.startswith("ERROR"):
+                self.speed_pwm = target
+            return response
+
+        self._plan_cancel.clear()
+        ticks = max(1, int(round(duration * rate)))
+        deadline = time.monotonic()
+        sent = None
+        for tick in range(1, ticks + 1):
+            pwm = ramp_pwm(start, target, tick / ticks, shape)
+            if self.protocol == "binary":
+                step = (OP_SPEED, pwm)
+            else:
+                # The legacy protocol only has the ten levels
+                step = ord('0') + min(range(10), key=lambda l: abs(speed_level_to_pwm(l) - pwm))
+            if step != sent:
+                response = self._dispatch(step, replace=self._is_speed_step)
+                if response.startswith("ERROR"):
+                    return response
+                self.speed_pwm = pwm
+                sent = step
+            deadline += duration / ticks
+            remaining = deadline - time.monotonic()
+            if remaining > 0 and self._plan_cancel.wait(remaining):
+                logger.info("Ramp aborted")
+                return "Ramp aborted"
+        self.speed_pwm = target
+        return f"Ramped to speed level {level} in {ticks} steps"
+
+    # Motion plans
+    @staticmethod
+    def _normalize_plan(plan):
+        """
+        Validate plan steps and convert them to (command, level, seconds).
+        
+        Args:
+            plan (list): (command, speed, duration) steps.
+            
+        Returns:
+            list: Normalized steps.
+            
+        Raises:
+            ValueError: If a step has an unknown command, speed or duration.
+        """
+        steps = []
+        for i, (command, speed, duration) in enumerate(plan):
+            cmd = _PLAN_COMMANDS.get(command)
+            if cmd is None:
+                raise ValueError(f"Step {i}: unknown command {command!r}")
+            if speed is not None and not 0 <= speed <= 9:
+                raise ValueError(f"Step {i}: invalid speed level {speed} (must be 0-9)")
+            if duration < 0:
+                raise ValueError(f"Step {i}: negative duration")
+            steps.append((cmd, speed, float(duration)))
+        return steps
+
+    def _send_step(self, cmd, speed):
+        """Send one plan step's command (and speed, if given)."""
+        if cmd != 'S':
+            return self._move(cmd, speed)
+        if speed is not None:
+            response = self.set_speed(speed)
+            if response.startswith("ERROR"):
+                return response
+        return self._stop()
+
+    def execute(self, plan, upload=False, stop_at_end=True):
+        """
+        Run a whole maneuver from a list of timed steps.
+        
+        On the host, each step starts at a deadline computed from the plan's
+        start time on the monotonic clock, so send latency and scheduling
+        jitter in one step do not push back the ones after it. stop() from
+        another thread aborts the plan.
+        
+        With upload=True the plan is sent to the Arduino in a few PLAN_LOAD
+        frames and a PLAN_RUN frame, and the Arduino times the steps itself;
+        this returns as soon as the plan is started. Needs the frame-capable
+        sketch, at most MAX_PLAN_STEPS steps and steps of at most 65.535 s.
+        
+        Args:
+            plan (list): (command, speed, duration) steps. command is one of
+                'forward', 'backward', 'left', 'right', 'stop' (or 'F', 'B',
+                'L', 'R', 'S'); speed is a level (0-9) or None to keep the
+                current one; duration is in seconds.
+            upload (bool): Let the Arduino run the plan locally (default: False).
+            stop_at_end (bool): Stop the motors after the last step (default: True).
+            
+        Returns:
+            str: Response message or error message.
+        """
+        try:
+            steps = self._normalize_plan(plan)
+        except ValueError as e:
+            logger.error(f"Invalid plan: {str(e)}")
+            return f"ERROR: Invalid plan: {str(e)}"
+        if not steps:
+            return "Plan is empty"
+        if upload:
+            return self._upload_plan(steps, stop_at_end)
+
+        logger.info("Executing plan of %d steps", len(steps))
+        self._plan_cancel.clear()
+        deadline = time.monotonic()
+        for cmd, speed, duration in steps:
+            response = self._send_step(cmd, speed)
+            if response.startswith("ERROR"):
+                return response
+            deadline += duration
+            remaining = deadline - time.monotonic()
+            if remaining > 0 and self._plan_cancel.wait(remaining):
+                logger.info("Plan aborted")
+                return "Plan aborted"
+        if stop_at_end:
+            response = self._stop()
+            if response.startswith("ERROR"):
+                return response
+        return f"Plan of {len(steps)} steps executed"
+
+    def _upload_plan(self, steps, stop_at_end):
+        """
+        Store a normalized plan on the Arduino and start it.
+        
+        Args:
+            steps (list): Normalized (command, level, seconds) steps.
+            stop_at_end (bool): Append a stop step.
+            
+        Returns:
+            str: Response message or error message.
+        """
+        frames = [(cmd, level, round(duration * 1000)) for cmd, level, duration in steps]
+        if stop_at_end and frames[-1][0] != 'S':
+            frames.append(('S', None, 0))
+        if len(frames) > MAX_PLAN_STEPS:
+            logger.error(f"Plan too long to upload: {len(frames)} steps (max {MAX_PLAN_STEPS})")
+            return f"ERROR: Plan too long to upload (max {MAX_PLAN_STEPS} steps)"
+        if any(duration_ms > 0xFFFF for _, _, duration_ms in frames):
+            logger.error("Plan step too long to upload (max 65.535 s)")
+            return "ERROR: Plan step too long to upload (max 65.535 s)"
+
+        logger.info("Uploading plan of %d steps", len(frames))
+        for index in range(0, len(frames), PLAN_STEPS_PER_FRAME):
+            chunk = tuple(frames[index:index + PLAN_STEPS_PER_FRAME])
+            response = self.send_frame(OP_PLAN_LOAD, index, chunk)
+            if response.startswith("ERROR"):
+                return response
+        response = self.send_frame(OP_PLAN_RUN, len(frames))
+        if response.startswith("ERROR"):
+            return response
+        return f"Plan of {len(frames)} steps uploaded"
+
+    def play(self, trajectory, stop_at_end=True):
+        """
+        Play a precompiled Trajectory, one drive frame per tick.
+        
+        Ticks run on one monotonic schedule like execute() steps, and the
+        loop does no kinematics: it only indexes the wheel arrays. stop()
+        from another thread aborts playback. Requires the frame-capable sketch.
+        
+        Args:
+            trajectory (Trajectory): The compiled trajectory (zenbot.trajectory).
+            stop_at_end (bool): Stop the motors after the last tick (default: True).
+            
+        Returns:
+            str: Response message or error message.
+        """
+        if not len(trajectory):
+            return "Trajectory is empty"
+        logger.info("Playing trajectory of %d ticks (%.2f s)", len(trajectory), trajectory.duration)
+        self._plan_cancel.clear()
+        period = trajectory.period
+        cancelled = self._plan_cancel.wait
+        deadline = time.monotonic()
+        for left, right in zip(trajectory.left.tolist(), trajectory.right.tolist()):
+            response = self._dispatch((OP_DRIVE, left, right, 0), replace=self._is_setpoint)
+            if response.startswith("ERROR"):
+                return response
+            deadline += period
+            remaining = deadline - time.monotonic()
+            if remaining > 0 and cancelled(remaining):
+                logger.info("Trajectory aborted")
+                return "Trajectory aborted"
+        if stop_at_end:
+            response = self._stop()
+            if response.startswith("ERROR"):
+                return response
+        return f"Trajectory of {len(trajectory)} ticks played"
+
+    def get_status(self, max_age=None):
+        """
+        Read the Arduino's status, reusing a recent snapshot when possible.
+        
+        Snapshots are cached for status_ttl seconds, and dropped whenever a
+        command is written, so frequent pollers don't flood the bus. In
+        pipelined mode the read is not ordered behind queued commands; call
+        flush() first if it has to be.
+        
+        Args:
+            max_age (float): Maximum acceptable snapshot age in seconds
+                (default: status_ttl). Pass 0 to force a bus read.
+            
+        Returns:
+            Status: The parsed snapshot, or an error message string.
+        """
+        if max_age is None:
+            max_age = self.status_ttl
+        # One reader at a time; the others reuse what it fetched
+        with self._status_lock:
+            status = self._status
+            if status is not None and status.age() <= max_age:
+                return status
+            if not self.bus and (self._breaker is None or self._closed):
+                logger.error("Cannot read status - I2C bus not open")
+                return "ERROR: I2C bus not open"
+            logger.debug("Reading status from Arduino")
+            try:
+                self._check_breaker()
+                with self._bus_lock:
+                    self._reopen_if_due()
+                    data = self.bus.read_i2c_block_data(self.address, ord('?'), STATUS_SIZE)
+                    status = decode_status(data)
+                    self._status = status
+                self._transaction_succeeded()
+            except CircuitOpenError as e:
+                return f"ERROR: {str(e)}"
+            except Exception as e:
+                logger.error(f"Error reading status: {str(e)}")
+                self._transaction_failed(e)
+                return f"ERROR: {str(e)}"
+            return status
    
     def close(self):
         """
@@ -206,9 +1099,22 @@ class MotorController:
         Returns:
             bool: True if closed successfully, False otherwise.
         """
-        if self.bus:
-            logger.info("Closing I2C connection")
-            self.bus.close()
-            self.bus = None
-            return True
-        return False 
\ No newline at end of file
+        with self._close_lock:
+            # Senders check this before touching the bus, so set it first
+            self._closed = True
+            if self._heartbeat is not None:
+                self._heartbeat.stop()
+                self._heartbeat = None
+            if self._pipeline is not None:
+                # Drains what is queued; later submits are refused. The
+                # pipeline object stays, so concurrent senders never see None.
+                self._pipeline.close()
+            with self._bus_lock:
+                if not self.bus:
+                    return False
+                # A shared bus belongs to its BusManager
+                if self.bus is not self._shared_bus:
+                    logger.info("Closing I2C connection")
+                    self.bus.close()
+                self.bus = None
+            return True
\ No newline at end of file
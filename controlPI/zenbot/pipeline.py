@@ -0,0 +1,255 @@
+"""
+Pipelined command path: bounded priority queues drained by a background writer thread.
+"""
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+SAFETY = 0
+CONTROL = 1
+TELEMETRY = 2
+PRIORITIES = (SAFETY, CONTROL, TELEMETRY)
+
+
+class TokenBucket:
+    """Rate limiter allowing ``rate`` writes per second on average and
+    bursts of up to ``burst`` writes. Not thread-safe."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            burst (int): Bucket capacity (default: 1).
+            clock (callable): Time source in seconds (default: time.monotonic).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._clock = clock
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self):
+        """
+        Time until a token is available.
+
+        Returns:
+            float: Seconds to wait, 0.0 if a token is available now.
+        """
+        self._refill(self._clock())
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def take(self):
+        """Use one token. The bucket may go into debt, which later writes repay."""
+        self._refill(self._clock())
+        self._tokens -= 1
+
+
+class CommandPipeline:
+    """Bounded priority queues of pending commands written to the bus by a worker thread.
+
+    The writer always takes the oldest command of the highest priority
+    class. SAFETY commands are never refused for lack of room, skip the
+    token bucket and can cancel pending commands they supersede, so their
+    latency is bounded by the write in flight plus min_interval.
+
+    Setpoints submitted with ``replace`` overwrite a stale setpoint still
+    waiting at the tail of the queue, so a producer streaming faster than
+    the bus drains never builds a backlog.
+    """
+
+    def __init__(self, write, maxsize=32, min_interval=0.02, rate=None, burst=1,
+                 name="zenbot-writer"):
+        """
+        Initialize the pipeline.
+
+        Args:
+            write (callable): Function called with each queued command.
+            maxsize (int): Maximum number of pending CONTROL and TELEMETRY commands (default: 32).
+            min_interval (float): Minimum gap in seconds between two writes (default: 0.02).
+            rate (float): Sustained writes per second for CONTROL and TELEMETRY
+                commands, or None for no limit beyond min_interval (default: None).
+            burst (int): Writes allowed back to back (at min_interval) when the
+                bucket is full (default: 1).
+            name (str): Name of the writer thread.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self._write = write
+        self.maxsize = maxsize
+        self.min_interval = min_interval
+        self._bucket = TokenBucket(rate, burst) if rate else None
+        self._queues = tuple(collections.deque() for _ in PRIORITIES)
+        self._cond = threading.Condition()
+        self._in_flight = False
+        self._closing = False
+        self._next_write = 0.0
+        self.cancelled = 0
+        self.replaced = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """int: Number of commands queued or currently being written."""
+        with self._cond:
+            return sum(map(len, self._queues)) + (1 if self._in_flight else 0)
+
+    def _has_room(self):
+        return len(self._queues[CONTROL]) + len(self._queues[TELEMETRY]) < self.maxsize
+
+    def submit(self, item, timeout=None, priority=CONTROL, cancel=None, replace=None):
+        """
+        Queue a command for the writer thread.
+
+        CONTROL and TELEMETRY submissions block while the queue is full,
+        which applies backpressure to producers that outpace the bus.
+
+        Args:
+            item (int or tuple): The command byte or frame to write.
+            timeout (float): Maximum time to wait for a free slot, or None to wait forever.
+            priority (int): SAFETY, CONTROL or TELEMETRY (default: CONTROL).
+            cancel (callable): Called with each pending command; those it
+                returns True for are dropped, e.g. moves superseded by a stop.
+            replace (callable): Called with the last pending command of the
+                same priority; if it returns True, item takes its place
+                instead of queueing behind it, without waiting for room.
+
+        Returns:
+            bool: True if the command was queued, False on timeout or after close().
+        """
+        with self._cond:
+            queue = self._queues[priority]
+            if replace is not None and queue and not self._closing and replace(queue[-1]):
+                queue[-1] = item
+                self.replaced += 1
+                return True
+            if priority != SAFETY and not self._cond.wait_for(
+                lambda: self._closing or self._has_room(), timeout
+            ):
+                return False
+            if self._closing:
+                return False
+            if cancel is not None:
+                self._cancel(cancel)
+            self._queues[priority].append(item)
+            self._cond.notify_all()
+            return True
+
+    def cancel(self, predicate):
+        """
+        Drop pending commands, e.g. moves superseded by a stop written elsewhere.
+
+        Args:
+            predicate (callable): Called with each pending command; those it
+                returns True for are dropped.
+        """
+        with self._cond:
+            self._cancel(predicate)
+            self._cond.notify_all()
+
+    def _cancel(self, predicate):
+        """Drop pending commands matching predicate. Call with the lock held."""
+        dropped = 0
+        for queue in self._queues:
+            kept = [item for item in queue if not predicate(item)]
+            dropped += len(queue) - len(kept)
+            if len(kept) != len(queue):
+                queue.clear()
+                queue.extend(kept)
+        if dropped:
+            self.cancelled += dropped
+            logger.debug("Cancelled %d superseded command(s)", dropped)
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until every queued command has been written.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds, or None to wait forever.
+
+        Returns:
+            bool: True if the pipeline drained, False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not any(self._queues) and not self._in_flight, timeout
+            )
+
+    def close(self, drain=True, timeout=1.0):
+        """
+        Stop the writer thread.
+
+        Args:
+            drain (bool): Write the remaining queued commands first (default: True).
+            timeout (float): Maximum time to wait for the writer to finish.
+        """
+        if drain:
+            self.wait_idle(timeout)
+        with self._cond:
+            self._closing = True
+            dropped = sum(map(len, self._queues))
+            for queue in self._queues:
+                queue.clear()
+            self._cond.notify_all()
+        if dropped:
+            logger.warning(f"Dropped {dropped} queued command(s) on close")
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _next(self):
+        """
+        Pop the command to write now. Call with the lock held.
+
+        Returns:
+            tuple: (item, delay); item is None and delay the seconds to wait
+            if the minimum gap or the rate limit holds the next command back.
+        """
+        delay = self._next_write - time.monotonic()
+        if not self._queues[SAFETY] and self._bucket is not None:
+            delay = max(delay, self._bucket.delay())
+        if delay > 0:
+            return None, delay
+        for queue in self._queues:
+            if queue:
+                return queue.popleft(), 0.0
+
+    def _run(self):
+        """Writer loop: wait for the gap and a token, pop the most urgent command, write."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closing or any(self._queues))
+                if self._closing:
+                    return
+                item, delay = self._next()
+                if item is None:
+                    # Woken early if a more urgent command arrives
+                    self._cond.wait(delay)
+                    continue
+                self._in_flight = True
+                self._cond.notify_all()
+
+            if self._bucket is not None:
+                self._bucket.take()
+            try:
+                self._write(item)
+            except Exception as e:
+                logger.error(f"Writer error: {str(e)}")
+            self._next_write = time.monotonic() + self.min_interval
+
+            with self._cond:
+                self._in_flight = False
+                self._cond.notify_all()
@@ -0,0 +1,143 @@
+"""
+Process-wide pool of open controllers, so repeated jobs reuse a warm connection.
+"""
+import atexit
+import contextlib
+import logging
+import threading
+
+from .motor_controller import MotorController
+
+logger = logging.getLogger(__name__)
+
+
+class ControllerPool:
+    """Keeps one open MotorController per (i2c_bus, address).
+
+    The first acquire() for a robot pays for opening the bus and the
+    connection probe; later jobs get the same controller back. Jobs may
+    overlap: the robot is stopped when the last one releases it, and the
+    controllers are closed by close().
+    """
+
+    def __init__(self):
+        """Initialize an empty pool. Controllers are created on first use."""
+        self._controllers = {}
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def acquire(self, i2c_bus=3, address=0x08, **kwargs):
+        """
+        Get the controller for a robot, creating it on first use.
+
+        Pair every call with release().
+
+        Args:
+            i2c_bus (int): The I2C bus number (default: 3).
+            address (int): The I2C address of the Arduino (default: 0x08).
+            **kwargs: Extra MotorController arguments, used on creation only.
+
+        Returns:
+            MotorController: The shared controller.
+        """
+        key = (i2c_bus, address)
+        with self._lock:
+            controller = self._controllers.get(key)
+            if controller is not None and controller.closed:
+                # Closed behind the pool's back; replace it
+                controller = None
+            if controller is None:
+                # Created under the lock, so concurrent jobs never probe twice
+                logger.info(f"Adding controller for bus {i2c_bus}, address 0x{address:02X} to the pool")
+                controller = MotorController(i2c_bus=i2c_bus, address=address, **kwargs)
+                self._controllers[key] = controller
+                self._users[key] = 0
+            self._users[key] += 1
+            return controller
+
+    def release(self, controller, stop=True):
+        """
+        Hand a controller back after a job.
+
+        Args:
+            controller (MotorController): A controller from acquire().
+            stop (bool): Stop the robot if no other job is using it (default: True).
+        """
+        key = (controller.i2c_bus, controller.address)
+        with self._lock:
+            if self._controllers.get(key) is not controller:
+                return
+            self._users[key] -= 1
+            # Stop under the lock, so a job acquiring the robot meanwhile
+            # can't have its first command cancelled by this stop
+            if stop and self._users[key] == 0 and not controller.closed:
+                controller.stop()
+
+    @contextlib.contextmanager
+    def controller(self, i2c_bus=3, address=0x08, stop=True, **kwargs):
+        """
+        Use a pooled controller for the duration of a with block.
+
+        Args:
+            i2c_bus (int): The I2C bus number (default: 3).
+            address (int): The I2C address of the Arduino (default: 0x08).
+            stop (bool): Stop the robot on exit, even on an exception, unless
+                another job is still using it (default: True).
+            **kwargs: Extra MotorController arguments, used on creation only.
+
+        Yields:
+            MotorController: The shared controller.
+        """
+        controller = self.acquire(i2c_bus, address, **kwargs)
+        try:
+            yield controller
+        finally:
+            self.release(controller, stop=stop)
+
+    def close(self):
+        """Stop and close every pooled controller."""
+        with self._lock:
+            controllers = list(self._controllers.values())
+            self._controllers.clear()
+            self._users.clear()
+        for controller in controllers:
+            if not controller.closed:
+                controller.stop()
+                controller.close()
+
+
+_default_pool = ControllerPool()
+# Robots are stopped and buses closed however the process ends normally
+atexit.register(_default_pool.close)
+
+
+def get_pool():
+    """
+    Get the process-wide pool.
+
+    Returns:
+        ControllerPool: The pool used by pooled().
+    """
+    return _default_pool
+
+
+def pooled(i2c_bus=3, address=0x08, stop=True, **kwargs):
+    """
+    Use a controller from the process-wide pool in a with block.
+
+    Args:
+        i2c_bus (int): The I2C bus number (default: 3).
+        address (int): The I2C address of the Arduino (default: 0x08).
+        stop (bool): Stop the robot on exit unless another job is using it (default: True).
+        **kwargs: Extra MotorController arguments, used on creation only.
+
+    Returns:
+        contextmanager: Yields the shared MotorController.
+    """
+    return _default_pool.controller(i2c_bus, address, stop=stop, **kwargs)
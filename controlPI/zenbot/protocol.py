@@ -0,0 +1,369 @@
+"""
+Binary command frames for the Arduino motor sketch.
+
+A frame is written with ``write_i2c_block_data(address, FRAME_MAGIC, body)``.
+FRAME_MAGIC is not a printable character, so the sketch can tell a frame
+from a legacy single-character command by its first byte. The body is::
+
+    version (B) | opcode (B) | payload ... | checksum (B)
+
+where the checksum is the XOR of FRAME_MAGIC and every body byte before it.
+Multi-byte payload fields are little-endian.
+
+Status is read back with ``read_i2c_block_data(address, ord('?'), STATUS_SIZE)``
+and decoded by decode_status().
+"""
+import collections
+import struct
+import time
+
+FRAME_MAGIC = 0xA5
+FRAME_VERSION = 1
+
+# Opcodes (keep in sync with the sketch)
+OP_STOP = 0x01   # no payload
+OP_DRIVE = 0x02  # left (h), right (h), duration_ms (H)
+OP_SPEED = 0x03  # pwm (B)
+OP_PLAN_LOAD = 0x04  # first index (B), then up to PLAN_STEPS_PER_FRAME steps
+OP_PLAN_RUN = 0x05   # step count (B)
+OP_RAMP = 0x06       # target pwm (B), duration_ms (H), profile (B)
+OP_MOVE = 0x07       # command (c), speed level (B) or PLAN_KEEP_SPEED
+
+OPCODE_NAMES = {
+    OP_STOP: "STOP", OP_DRIVE: "DRIVE", OP_SPEED: "SPEED",
+    OP_PLAN_LOAD: "PLAN_LOAD", OP_PLAN_RUN: "PLAN_RUN", OP_RAMP: "RAMP",
+    OP_MOVE: "MOVE",
+}
+
+# Speed ramp profiles (keep in sync with the sketch's rampShape())
+RAMP_LINEAR = 0
+RAMP_S_CURVE = 1
+RAMP_PROFILES = {"linear": RAMP_LINEAR, "s-curve": RAMP_S_CURVE}
+
+# Onboard motion plans: each step is command (c), speed level (B), duration_ms (H)
+MAX_PLAN_STEPS = 32
+PLAN_STEPS_PER_FRAME = 6
+PLAN_KEEP_SPEED = 0xFF
+
+MAX_PWM = 255
+
+STATUS_SIZE = 8
+_STATUS = struct.Struct('<BcBBHB')
+
+DIRECTION_NAMES = {
+    'F': "forward", 'B': "backward", 'L': "left", 'R': "right",
+    'S': "stopped", 'D': "drive",
+}
+
+
+def speed_level_to_pwm(level):
+    """
+    Convert a 0-9 speed level to the PWM value the sketch uses.
+
+    Mirrors ``map(level, 0, 9, 50, 255)`` on the Arduino.
+
+    Args:
+        level (int): Speed level from 0 to 9.
+
+    Returns:
+        int: PWM duty from 50 to 255.
+    """
+    return 50 + (level * (255 - 50)) // 9
+
+
+def ramp_shape(fraction, profile=RAMP_LINEAR):
+    """
+    Progress of a speed ramp.
+
+    The S-curve is smoothstep, so acceleration starts and ends at zero.
+
+    Args:
+        fraction (float): Elapsed share of the ramp time, 0.0 to 1.0.
+        profile (int): RAMP_LINEAR or RAMP_S_CURVE.
+
+    Returns:
+        float: Share of the speed change applied, 0.0 to 1.0.
+    """
+    fraction = max(0.0, min(1.0, fraction))
+    if profile == RAMP_S_CURVE:
+        return fraction * fraction * (3.0 - 2.0 * fraction)
+    return fraction
+
+
+def ramp_pwm(start, target, fraction, profile=RAMP_LINEAR):
+    """
+    PWM part way through a ramp, rounded like the sketch.
+
+    Args:
+        start (int): PWM when the ramp began.
+        target (int): PWM at the end of the ramp.
+        fraction (float): Elapsed share of the ramp time, 0.0 to 1.0.
+        profile (int): RAMP_LINEAR or RAMP_S_CURVE.
+
+    Returns:
+        int: PWM duty from 0 to 255.
+    """
+    return start + int(round((target - start) * ramp_shape(fraction, profile)))
+
+
+def _checksum(buf, end):
+    """XOR of FRAME_MAGIC and buf[0:end]."""
+    value = FRAME_MAGIC
+    for i in range(end):
+        value ^= buf[i]
+    return value
+
+
+class FrameEncoder:
+    """Packs command frames into preallocated buffers.
+
+    The returned buffers are reused by the next call for the same opcode,
+    so write each frame to the bus before encoding another one.
+    """
+
+    _HEADER = struct.Struct('<BB')
+    _DRIVE = struct.Struct('<BBhhH')
+    _SPEED = struct.Struct('<BBB')
+    _PLAN_LOAD = struct.Struct('<BBB')
+    _PLAN_STEP = struct.Struct('<cBH')
+    _PLAN_RUN = struct.Struct('<BBB')
+    _RAMP = struct.Struct('<BBBHB')
+    _MOVE = struct.Struct('<BBcB')
+
+    def __init__(self, version=FRAME_VERSION):
+        """
+        Initialize the encoder.
+
+        Args:
+            version (int): Protocol version written into every frame.
+        """
+        self.version = version
+        self._stop_buf = bytearray(self._HEADER.size + 1)
+        self._drive_buf = bytearray(self._DRIVE.size + 1)
+        self._speed_buf = bytearray(self._SPEED.size + 1)
+        self._plan_buf = bytearray(
+            self._PLAN_LOAD.size + PLAN_STEPS_PER_FRAME * self._PLAN_STEP.size + 1
+        )
+        self._plan_run_buf = bytearray(self._PLAN_RUN.size + 1)
+        self._ramp_buf = bytearray(self._RAMP.size + 1)
+        self._move_buf = bytearray(self._MOVE.size + 1)
+
+    @staticmethod
+    def _seal(buf):
+        """Write the checksum into the last byte of buf and return it."""
+        end = len(buf) - 1
+        buf[end] = _checksum(buf, end)
+        return buf
+
+    def stop(self):
+        """
+        Encode a stop frame.
+
+        Returns:
+            bytearray: Frame body.
+        """
+        self._HEADER.pack_into(self._stop_buf, 0, self.version, OP_STOP)
+        return self._seal(self._stop_buf)
+
+    def drive(self, left, right, duration_ms=0):
+        """
+        Encode a drive frame with signed per-wheel PWM.
+
+        Args:
+            left (int): Left wheel PWM from -255 (full reverse) to 255 (full forward).
+            right (int): Right wheel PWM from -255 to 255.
+            duration_ms (int): Stop after this many milliseconds, or 0 to hold (max 65535).
+
+        Returns:
+            bytearray: Frame body.
+        """
+        left = max(-MAX_PWM, min(MAX_PWM, int(left)))
+        right = max(-MAX_PWM, min(MAX_PWM, int(right)))
+        duration_ms = max(0, min(0xFFFF, int(duration_ms)))
+        self._DRIVE.pack_into(self._drive_buf, 0, self.version, OP_DRIVE,
+                              left, right, duration_ms)
+        return self._seal(self._drive_buf)
+
+    def speed(self, pwm):
+        """
+        Encode a speed frame setting the PWM used by the movement commands.
+
+        Args:
+            pwm (int): PWM duty from 0 to 255.
+
+        Returns:
+            bytearray: Frame body.
+        """
+        pwm = max(0, min(MAX_PWM, int(pwm)))
+        self._SPEED.pack_into(self._speed_buf, 0, self.version, OP_SPEED, pwm)
+        return self._seal(self._speed_buf)
+
+
+    def plan_load(self, index, steps):
+        """
+        Encode a frame storing plan steps on the Arduino.
+
+        Args:
+            index (int): Position of the first step in the onboard plan.
+            steps (sequence): Up to PLAN_STEPS_PER_FRAME (command, level, duration_ms)
+                tuples; level is None to keep the current speed.
+
+        Returns:
+            bytearray: Frame body.
+        """
+        if not 0 < len(steps) <= PLAN_STEPS_PER_FRAME:
+            raise ValueError(f"A plan frame holds 1-{PLAN_STEPS_PER_FRAME} steps")
+        if index + len(steps) > MAX_PLAN_STEPS:
+            raise ValueError(f"Plans are limited to {MAX_PLAN_STEPS} steps")
+        self._PLAN_LOAD.pack_into(self._plan_buf, 0, self.version, OP_PLAN_LOAD, index)
+        offset = self._PLAN_LOAD.size
+        for command, level, duration_ms in steps:
+            self._PLAN_STEP.pack_into(
+                self._plan_buf, offset, command.encode('ascii'),
+                PLAN_KEEP_SPEED if level is None else level,
+                max(0, min(0xFFFF, int(duration_ms))),
+            )
+            offset += self._PLAN_STEP.size
+        body = self._plan_buf[:offset + 1]
+        return self._seal(body)
+
+    def plan_run(self, count):
+        """
+        Encode a frame starting the first count steps of the onboard plan.
+
+        Args:
+            count (int): Number of steps to run.
+
+        Returns:
+            bytearray: Frame body.
+        """
+        self._PLAN_RUN.pack_into(self._plan_run_buf, 0, self.version, OP_PLAN_RUN, count)
+        return self._seal(self._plan_run_buf)
+
+    def ramp(self, pwm, duration_ms, profile=RAMP_LINEAR):
+        """
+        Encode a frame ramping the movement PWM to a new value.
+
+        Args:
+            pwm (int): Target PWM duty from 0 to 255.
+            duration_ms (int): Ramp time in milliseconds (max 65535).
+            profile (int): RAMP_LINEAR or RAMP_S_CURVE.
+
+        Returns:
+            bytearray: Frame body.
+        """
+        pwm = max(0, min(MAX_PWM, int(pwm)))
+        duration_ms = max(0, min(0xFFFF, int(duration_ms)))
+        self._RAMP.pack_into(self._ramp_buf, 0, self.version, OP_RAMP, pwm, duration_ms, profile)
+        return self._seal(self._ramp_buf)
+
+    def move(self, command, level=None):
+        """
+        Encode a movement frame, driven at the movement PWM like 'F'/'B'/'L'/'R'.
+
+        Args:
+            command (str): One of 'F', 'B', 'L' or 'R'.
+            level (int): Speed level (0-9) to set first, or None to keep the
+                current PWM, including a running ramp.
+
+        Returns:
+            bytearray: Frame body.
+        """
+        self._MOVE.pack_into(self._move_buf, 0, self.version, OP_MOVE, command.encode('ascii'),
+                             PLAN_KEEP_SPEED if level is None else level)
+        return self._seal(self._move_buf)
+
+def decode_frame(body):
+    """
+    Validate a frame body and split it into its parts.
+
+    Args:
+        body (bytes): Frame body as written after FRAME_MAGIC.
+
+    Returns:
+        tuple: (version, opcode, payload bytes).
+
+    Raises:
+        ValueError: If the frame is too short or the checksum does not match.
+    """
+    body = bytes(body)
+    if len(body) < 3:
+        raise ValueError("Frame too short")
+    if _checksum(body, len(body) - 1) != body[-1]:
+        raise ValueError("Frame checksum mismatch")
+    return body[0], body[1], body[2:-1]
+
+
+class Status(collections.namedtuple(
+        'Status', 'direction speed_level pwm watchdog_remaining last_command timestamp')):
+    """Telemetry snapshot read back from the Arduino.
+
+    Attributes:
+        direction (str): 'F', 'B', 'L', 'R', 'S' (stopped) or 'D' (per-wheel drive).
+        speed_level (int): Current speed level (0-9).
+        pwm (int): Current PWM duty (0-255).
+        watchdog_remaining (float): Seconds until the watchdog stops the motors.
+        last_command (str): Last movement or speed command received, or None.
+        timestamp (float): time.monotonic() when the snapshot was read.
+    """
+    __slots__ = ()
+
+    @property
+    def moving(self):
+        """bool: True unless the motors are stopped."""
+        return self.direction != 'S'
+
+    def age(self, now=None):
+        """
+        Seconds since the snapshot was read.
+
+        Args:
+            now (float): Current time.monotonic() value (default: read the clock).
+
+        Returns:
+            float: Age in seconds.
+        """
+        return (time.monotonic() if now is None else now) - self.timestamp
+
+    def __str__(self):
+        return (f"STAT:{DIRECTION_NAMES.get(self.direction, self.direction).upper()}"
+                f":SPD:{self.speed_level}:WD:{self.watchdog_remaining:.1f}s")
+
+
+def decode_status(data, timestamp=None):
+    """
+    Parse the status block returned by the sketch's requestEvent.
+
+    Args:
+        data (list): STATUS_SIZE bytes read from the Arduino.
+        timestamp (float): time.monotonic() of the read (default: now).
+
+    Returns:
+        Status: The parsed snapshot.
+
+    Raises:
+        ValueError: If the block has the wrong size, version or checksum.
+    """
+    data = bytes(data)
+    if len(data) != STATUS_SIZE:
+        raise ValueError(f"Status block must be {STATUS_SIZE} bytes, got {len(data)}")
+    if _checksum(data, STATUS_SIZE - 1) != data[-1]:
+        raise ValueError("Status checksum mismatch")
+    version, direction, level, pwm, remaining_ms, last = _STATUS.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported status version: {version}")
+    if last == 0:
+        last_command = None
+    elif last < 0x20:
+        # Binary frame opcode
+        last_command = OPCODE_NAMES.get(last, f"0x{last:02X}")
+    else:
+        last_command = chr(last)
+    return Status(
+        direction=direction.decode('ascii', 'replace'),
+        speed_level=level,
+        pwm=pwm,
+        watchdog_remaining=remaining_ms / 1000.0,
+        last_command=last_command,
+        timestamp=time.monotonic() if timestamp is None else timestamp,
+    )
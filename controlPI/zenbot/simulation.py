@@ -0,0 +1,349 @@
+"""
+Hardware-free bus backend: a simulated SMBus with virtual Arduinos.
+
+Any object with the subset of ``smbus2.SMBus`` that the controllers use can
+serve as a bus backend:
+
+- ``write_byte(address, value)``
+- ``write_i2c_block_data(address, register, data)``
+- ``read_i2c_block_data(address, register, length)``
+- ``close()``
+
+Pass a factory returning one as ``bus_factory`` to MotorController,
+AsyncMotorController or BusManager, or use ``zenbot-pi --simulate``.
+"""
+import collections
+import errno
+import threading
+import time
+
+from .protocol import (FRAME_MAGIC, FRAME_VERSION, MAX_PLAN_STEPS, OP_DRIVE, OP_MOVE,
+                       OP_PLAN_LOAD, OP_PLAN_RUN, OP_RAMP, OP_SPEED, OP_STOP,
+                       OPCODE_NAMES, PLAN_KEEP_SPEED, STATUS_SIZE, _checksum,
+                       decode_frame, ramp_pwm, speed_level_to_pwm)
+
+_PLAN_STEP_SIZE = 4
+
+
+class VirtualArduino:
+    """Software model of the motor sketch's I2C command handling.
+
+    Reproduces processCommand/processFrame, the 0-9 to 50-255 speed mapping,
+    timed drives, onboard plans, speed ramps, the status block and the watchdog. Time is
+    read from ``clock`` and the sketch's loop() runs lazily before every
+    transaction, or when update() is called.
+    """
+
+    def __init__(self, address=0x08, watchdog_timeout=15.0, clock=time.monotonic):
+        """
+        Initialize the virtual Arduino in its boot state.
+
+        Args:
+            address (int): The I2C address it answers on (default: 0x08).
+            watchdog_timeout (float): Seconds without a command before the motors stop (default: 15.0).
+            clock (callable): Time source in seconds (default: time.monotonic).
+        """
+        self.address = address
+        self.watchdog_timeout = watchdog_timeout
+        self.clock = clock
+        self.direction = 'S'
+        self.current_speed = 200
+        self.drive_wheels = (0, 0)
+        self.last_command = 0
+        self.last_activity = clock()
+        self.drive_until = None
+        self.plan = [None] * MAX_PLAN_STEPS
+        self.plan_length = 0
+        self.plan_index = 0
+        self.plan_active = False
+        self.step_started = 0.0
+        self.ramp = None
+        self.watchdog_trips = 0
+        self.received = []
+        self.errors = collections.Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def wheels(self):
+        """tuple: Current signed (left, right) wheel PWM."""
+        if self.direction == 'D':
+            return self.drive_wheels
+        signs = {'F': (1, 1), 'B': (-1, -1), 'L': (-1, 1), 'R': (1, -1)}.get(self.direction, (0, 0))
+        return (signs[0] * self.current_speed, signs[1] * self.current_speed)
+
+    @property
+    def speed_level(self):
+        """int: Current speed as a 0-9 level, like the sketch's map() back."""
+        return max(0, min(9, (self.current_speed - 50) * 9 // (255 - 50)))
+
+    # Sketch loop()
+    def update(self):
+        """Run the sketch's loop(): plan steps, speed ramps, timed drives and the watchdog."""
+        with self._lock:
+            self._update(self.clock())
+
+    def _update(self, now):
+        if self.ramp is not None:
+            start, target, started, duration, profile = self.ramp
+            fraction = (now - started) / duration if duration else 1.0
+            self.current_speed = ramp_pwm(start, target, fraction, profile)
+            if fraction >= 1.0:
+                self.ramp = None
+
+        while self.plan_active and now - self.step_started >= self.plan[self.plan_index][2]:
+            self.step_started += self.plan[self.plan_index][2]
+            self.plan_index += 1
+            if self.plan_index < self.plan_length:
+                self._start_plan_step(self.step_started)
+            else:
+                self.plan_active = False
+
+        if self.drive_until is not None and now >= self.drive_until:
+            self.drive_until = None
+            self._stop_motors()
+
+        if now - self.last_activity > self.watchdog_timeout:
+            self._stop_motors()
+            self.watchdog_trips += 1
+            self.last_activity = now
+
+    # Wire callbacks
+    def receive(self, data):
+        """
+        Handle one I2C write, like the sketch's receiveEvent().
+
+        Args:
+            data (bytes): Every byte of the write, including the register byte.
+        """
+        if not data:
+            return
+        with self._lock:
+            now = self.clock()
+            self._update(now)
+            if data[0] == FRAME_MAGIC:
+                self._process_frame(bytes(data[1:]), now)
+            else:
+                self._process_command(chr(data[0]), now)
+
+    def request(self, length):
+        """
+        Answer an I2C read, like the sketch's requestEvent().
+
+        Args:
+            length (int): Number of bytes requested.
+
+        Returns:
+            list: The status block, padded with 0xFF like an idle bus.
+        """
+        with self._lock:
+            now = self.clock()
+            self._update(now)
+            idle = now - self.last_activity
+            remaining = int(max(0.0, self.watchdog_timeout - idle) * 1000)
+            remaining = min(remaining, 0xFFFF)
+            status = bytearray([
+                FRAME_VERSION, ord(self.direction), self.speed_level, self.current_speed,
+                remaining & 0xFF, remaining >> 8, self.last_command, 0,
+            ])
+            status[-1] = _checksum(status, STATUS_SIZE - 1)
+        data = list(status[:length])
+        return data + [0xFF] * (length - len(data))
+
+    # Command handling
+    def _process_command(self, command, now):
+        if command != '?':
+            self.last_activity = now
+            self.last_command = ord(command)
+        if command not in ('?', 'X'):
+            self.plan_active = False
+            self.drive_until = None
+        if command == 'S' or '0' <= command <= '9':
+            self.ramp = None
+        self.received.append(command)
+
+        if command in 'FBLR':
+            self.direction = command
+        elif command == 'S':
+            self._stop_motors()
+        elif '0' <= command <= '9':
+            self.current_speed = speed_level_to_pwm(ord(command) - ord('0'))
+        elif command not in ('X', '?'):
+            self.errors["invalid"] += 1
+
+    def _process_frame(self, body, now):
+        self.last_activity = now
+        try:
+            version, opcode, payload = decode_frame(body)
+        except ValueError:
+            self.errors["checksum" if len(body) >= 3 else "frame"] += 1
+            return
+        if version != FRAME_VERSION:
+            self.errors["frame"] += 1
+            return
+
+        self.drive_until = None
+        self.plan_active = False
+        if opcode != OP_MOVE:
+            # Like the movement characters, MOVE keeps a running ramp
+            self.ramp = None
+        self.last_command = opcode
+        self.received.append(OPCODE_NAMES.get(opcode, f"0x{opcode:02X}"))
+
+        if opcode == OP_STOP:
+            self._stop_motors()
+        elif opcode == OP_DRIVE and len(payload) >= 6:
+            left = int.from_bytes(payload[0:2], 'little', signed=True)
+            right = int.from_bytes(payload[2:4], 'little', signed=True)
+            duration = int.from_bytes(payload[4:6], 'little')
+            self._set_wheels(left, right)
+            if duration:
+                self.drive_until = now + duration / 1000.0
+        elif opcode == OP_MOVE and len(payload) >= 2 and chr(payload[0]) in 'FBLR':
+            if payload[1] != PLAN_KEEP_SPEED:
+                self.ramp = None
+                self.current_speed = speed_level_to_pwm(payload[1])
+            self.direction = chr(payload[0])
+        elif opcode == OP_SPEED and len(payload) >= 1:
+            self.current_speed = payload[0]
+        elif opcode == OP_RAMP and len(payload) >= 4:
+            duration = int.from_bytes(payload[1:3], 'little') / 1000.0
+            self.ramp = (self.current_speed, payload[0], now, duration, payload[3])
+            self._update(now)
+        elif opcode == OP_PLAN_LOAD and len(payload) >= 1 + _PLAN_STEP_SIZE:
+            index = payload[0]
+            steps = (len(payload) - 1) // _PLAN_STEP_SIZE
+            if index + steps > MAX_PLAN_STEPS:
+                self.errors["plan"] += 1
+                return
+            for i in range(steps):
+                step = payload[1 + i * _PLAN_STEP_SIZE:1 + (i + 1) * _PLAN_STEP_SIZE]
+                self.plan[index + i] = (chr(step[0]), step[1],
+                                        int.from_bytes(step[2:4], 'little') / 1000.0)
+        elif opcode == OP_PLAN_RUN and len(payload) >= 1 and 1 <= payload[0] <= MAX_PLAN_STEPS:
+            self.plan_length = payload[0]
+            self.plan_index = 0
+            self.plan_active = True
+            self._start_plan_step(now)
+        else:
+            self.errors["frame"] += 1
+
+    def _start_plan_step(self, now):
+        command, level, _ = self.plan[self.plan_index]
+        if level != PLAN_KEEP_SPEED:
+            self.current_speed = speed_level_to_pwm(level)
+        if command in 'FBLR':
+            self.direction = command
+        else:
+            self._stop_motors()
+        self.step_started = now
+        self.last_activity = now
+
+    def _set_wheels(self, left, right):
+        self.drive_wheels = (max(-255, min(255, left)), max(-255, min(255, right)))
+        self.direction = 'S' if left == 0 and right == 0 else 'D'
+
+    def _stop_motors(self):
+        self.direction = 'S'
+        self.drive_wheels = (0, 0)
+
+
+class SimulatedBus:
+    """SMBus stand-in that routes transactions to VirtualArduino devices."""
+
+    def __init__(self, addresses=(0x08,), latency=0.0, clock=time.monotonic):
+        """
+        Initialize the bus with one VirtualArduino per address.
+
+        Args:
+            addresses (tuple): I2C addresses to populate (default: (0x08,)).
+            latency (float): Seconds each transaction takes (default: 0.0).
+            clock (callable): Time source shared with the devices.
+        """
+        self.latency = latency
+        self.clock = clock
+        self.devices = {}
+        self.transactions = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        for address in addresses:
+            self.add_device(VirtualArduino(address, clock=clock))
+
+    def add_device(self, device):
+        """
+        Attach a device to the bus.
+
+        Args:
+            device (VirtualArduino): The device to attach.
+
+        Returns:
+            VirtualArduino: The device.
+        """
+        self.devices[device.address] = device
+        return device
+
+    def _device(self, address):
+        if self.closed:
+            raise OSError(errno.EBADF, "Bus is closed")
+        device = self.devices.get(address)
+        if device is None:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        return device
+
+    def _transaction(self):
+        """Account for one transaction and its simulated bus time."""
+        self.transactions += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def write_byte(self, address, value, force=None):
+        with self._lock:
+            device = self._device(address)
+            self._transaction()
+            device.receive(bytes([value]))
+
+    def write_i2c_block_data(self, address, register, data, force=None):
+        if len(data) > 32:
+            raise ValueError("Data length cannot exceed 32 bytes")
+        with self._lock:
+            device = self._device(address)
+            self._transaction()
+            device.receive(bytes([register]) + bytes(data))
+
+    def read_i2c_block_data(self, address, register, length, force=None):
+        with self._lock:
+            device = self._device(address)
+            self._transaction()
+            device.receive(bytes([register]))
+            return device.request(length)
+
+    def close(self):
+        self.closed = True
+
+
+def simulated_bus_factory(addresses=(0x08,), latency=0.0):
+    """
+    Build a bus_factory that gives each bus number its own SimulatedBus.
+
+    Opening the same bus number again returns the same simulated bus, so
+    the virtual Arduinos keep their state across controllers.
+
+    Args:
+        addresses (tuple): Device addresses on every bus (default: (0x08,)).
+        latency (float): Seconds each transaction takes (default: 0.0).
+
+    Returns:
+        callable: Factory taking a bus number and returning a SimulatedBus.
+    """
+    buses = {}
+
+    def factory(i2c_bus):
+        bus = buses.get(i2c_bus)
+        if bus is None or bus.closed:
+            old_devices = bus.devices if bus is not None else None
+            bus = buses[i2c_bus] = SimulatedBus(addresses, latency=latency)
+            if old_devices is not None:
+                bus.devices = old_devices
+        return bus
+
+    factory.buses = buses
+    return factory
@@ -0,0 +1,195 @@
+"""
+Trajectories precompiled into per-tick wheel PWM arrays.
+
+All kinematics run once, when the trajectory is built; playback with
+MotorController.play() only indexes the arrays and writes drive frames.
+The arrays are NumPy int16 arrays when NumPy is installed, otherwise
+``array('h')``.
+"""
+import array
+import bisect
+import math
+
+from .kinematics import MAX_WHEEL_SPEED, WHEEL_BASE, velocity_to_pwm
+from .protocol import MAX_PWM
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Default control period: 50 Hz
+PERIOD = 0.02
+
+
+def _wheel_arrays(linear, angular, wheel_base, max_wheel_speed):
+    """
+    Convert velocity samples to per-wheel PWM arrays.
+
+    Args:
+        linear (sequence): Forward speeds in m/s.
+        angular (sequence): Turn rates in rad/s.
+        wheel_base (float): Distance between the wheels in m.
+        max_wheel_speed (float): Wheel speed in m/s at full PWM.
+
+    Returns:
+        tuple: (left, right) int16 arrays.
+    """
+    if numpy is None:
+        left = array.array('h')
+        right = array.array('h')
+        for v, w in zip(linear, angular):
+            l_pwm, r_pwm = velocity_to_pwm(v, w, wheel_base, max_wheel_speed)
+            left.append(l_pwm)
+            right.append(r_pwm)
+        return left, right
+
+    # Same math as velocity_to_pwm, on whole arrays
+    linear = numpy.asarray(linear, dtype=float)
+    turn = numpy.asarray(angular, dtype=float) * (wheel_base / 2.0)
+    scale = MAX_PWM / max_wheel_speed
+    left = (linear - turn) * scale
+    right = (linear + turn) * scale
+    peak = numpy.maximum(numpy.abs(left), numpy.abs(right))
+    factor = MAX_PWM / numpy.maximum(peak, MAX_PWM)
+    return (numpy.rint(left * factor).astype(numpy.int16),
+            numpy.rint(right * factor).astype(numpy.int16))
+
+
+class Trajectory:
+    """Per-tick (left, right) PWM for a whole path.
+
+    Attributes:
+        left (array): Left wheel PWM per tick.
+        right (array): Right wheel PWM per tick.
+        period (float): Seconds per tick.
+    """
+
+    def __init__(self, left, right, period=PERIOD):
+        """
+        Wrap precomputed wheel arrays.
+
+        Args:
+            left (array): Left wheel PWM per tick, -255 to 255.
+            right (array): Right wheel PWM per tick, -255 to 255.
+            period (float): Seconds per tick (default: PERIOD).
+        """
+        if len(left) != len(right):
+            raise ValueError("left and right must have the same length")
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.left = left
+        self.right = right
+        self.period = period
+
+    def __len__(self):
+        return len(self.left)
+
+    @property
+    def duration(self):
+        """float: Playback time in seconds."""
+        return len(self.left) * self.period
+
+    @classmethod
+    def from_segments(cls, segments, period=PERIOD, wheel_base=WHEEL_BASE,
+                      max_wheel_speed=MAX_WHEEL_SPEED):
+        """
+        Compile constant-velocity segments.
+
+        Args:
+            segments (list): (duration, linear, angular) tuples in s, m/s and rad/s.
+            period (float): Seconds per tick (default: PERIOD).
+            wheel_base (float): Distance between the wheels in m.
+            max_wheel_speed (float): Wheel speed in m/s at full PWM.
+
+        Returns:
+            Trajectory: One tick per period, each segment rounded to whole ticks.
+        """
+        counts = [max(0, int(round(duration / period))) for duration, _, _ in segments]
+        left, right = _wheel_arrays([s[1] for s in segments], [s[2] for s in segments],
+                                    wheel_base, max_wheel_speed)
+        if numpy is not None:
+            return cls(numpy.repeat(left, counts), numpy.repeat(right, counts), period)
+        ticks_left = array.array('h')
+        ticks_right = array.array('h')
+        for l_pwm, r_pwm, count in zip(left, right, counts):
+            ticks_left.extend([l_pwm] * count)
+            ticks_right.extend([r_pwm] * count)
+        return cls(ticks_left, ticks_right, period)
+
+    @classmethod
+    def from_profile(cls, times, linear, angular, period=PERIOD, wheel_base=WHEEL_BASE,
+                     max_wheel_speed=MAX_WHEEL_SPEED):
+        """
+        Compile a sampled (t, v, w) velocity profile.
+
+        The profile is interpolated linearly onto the tick grid, from the
+        first sample time up to (not including) the last.
+
+        Args:
+            times (sequence): Increasing sample times in s.
+            linear (sequence): Forward speed in m/s at each sample time.
+            angular (sequence): Turn rate in rad/s at each sample time.
+            period (float): Seconds per tick (default: PERIOD).
+            wheel_base (float): Distance between the wheels in m.
+            max_wheel_speed (float): Wheel speed in m/s at full PWM.
+
+        Returns:
+            Trajectory: The compiled trajectory.
+        """
+        if not len(times) == len(linear) == len(angular):
+            raise ValueError("times, linear and angular must have the same length")
+        if len(times) < 2:
+            raise ValueError("A profile needs at least two samples")
+        count = int(round((times[-1] - times[0]) / period))
+        if numpy is not None:
+            ticks = times[0] + numpy.arange(count) * period
+            v = numpy.interp(ticks, times, linear)
+            w = numpy.interp(ticks, times, angular)
+        else:
+            v = []
+            w = []
+            for i in range(count):
+                t = times[0] + i * period
+                k = min(bisect.bisect_right(times, t), len(times) - 1)
+                span = times[k] - times[k - 1]
+                f = (t - times[k - 1]) / span if span > 0 else 0.0
+                v.append(linear[k - 1] + f * (linear[k] - linear[k - 1]))
+                w.append(angular[k - 1] + f * (angular[k] - angular[k - 1]))
+        left, right = _wheel_arrays(v, w, wheel_base, max_wheel_speed)
+        return cls(left, right, period)
+
+    @classmethod
+    def from_waypoints(cls, waypoints, speed, turn_rate=1.0, heading=0.0, period=PERIOD,
+                       wheel_base=WHEEL_BASE, max_wheel_speed=MAX_WHEEL_SPEED):
+        """
+        Compile a path through (x, y) waypoints: turn in place towards each
+        waypoint, then drive straight to it.
+
+        Args:
+            waypoints (list): (x, y) positions in m; the first is the start.
+            speed (float): Driving speed in m/s.
+            turn_rate (float): Turning speed in rad/s (default: 1.0).
+            heading (float): Starting heading in rad, 0 along +x (default: 0.0).
+            period (float): Seconds per tick (default: PERIOD).
+            wheel_base (float): Distance between the wheels in m.
+            max_wheel_speed (float): Wheel speed in m/s at full PWM.
+
+        Returns:
+            Trajectory: The compiled trajectory.
+        """
+        if speed <= 0 or turn_rate <= 0:
+            raise ValueError("speed and turn_rate must be positive")
+        segments = []
+        for (x0, y0), (x1, y1) in zip(waypoints, waypoints[1:]):
+            distance = math.hypot(x1 - x0, y1 - y0)
+            if distance == 0:
+                continue
+            target = math.atan2(y1 - y0, x1 - x0)
+            # Shortest turn, in (-pi, pi]
+            turn = math.remainder(target - heading, 2 * math.pi)
+            if turn:
+                segments.append((abs(turn) / turn_rate, 0.0, math.copysign(turn_rate, turn)))
+            segments.append((distance / speed, speed, 0.0))
+            heading = target
+        return cls.from_segments(segments, period, wheel_base, max_wheel_speed)